@@ -0,0 +1,179 @@
+# aggregates.py (offline build of materialized endpoint payloads, one artifact per snapshot)
+#
+#   python aggregates.py            build once for the current snapshot
+#   python aggregates.py --watch    rebuild whenever sync copies in new parquet files
+#
+# The artifact is the JSON bodies concatenated back to back; manifest.json maps each
+# entry to its (offset, length) and the dataset versions it was computed from.
+# The API (materialize.py) serves an entry only while those versions are still current.
+# Every snapshot loaded here is also written to data/arrow/ as uncompressed Feather
+# (arrow_store.py), which the API memory-maps instead of decoding the parquet.
+import argparse
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlencode
+
+from fastapi import params
+
+import deps
+
+log = logging.getLogger(__name__)
+
+STORE = deps.DATA / "aggregates"
+MANIFEST = STORE / "manifest.json"
+
+
+def entry_key(endpoint: str, query: tuple) -> str:
+    return f"{endpoint}?{urlencode(query)}"
+
+
+# --- serving side -----------------------------------------------------------
+
+_manifest: dict = {"mtime": None, "data": None}
+
+
+def _load_manifest() -> Optional[dict]:
+    try:
+        mtime = MANIFEST.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    if _manifest["mtime"] != mtime:
+        _manifest["data"] = json.loads(MANIFEST.read_bytes())
+        _manifest["mtime"] = mtime
+    return _manifest["data"]
+
+
+def lookup(endpoint: str, query: tuple, versions: dict[str, float]) -> Optional[bytes]:
+    """Prebuilt body for this endpoint/query, if it was built from exactly `versions`."""
+    manifest = _load_manifest()
+    if manifest is None:
+        return None
+    entry = manifest["entries"].get(entry_key(endpoint, query))
+    if entry is None or entry["sources"] != versions:
+        return None
+    with open(STORE / manifest["artifact"], "rb") as f:
+        f.seek(entry["offset"])
+        return f.read(entry["length"])
+
+
+# --- build side ---------------------------------------------------------------
+
+def _default_kwargs(fn) -> Optional[dict]:
+    """Call arguments for an endpoint's default variant; None if a param has no default."""
+    kwargs = {}
+    for name, p in inspect.signature(fn).parameters.items():
+        default = p.default
+        if isinstance(default, params.Depends):
+            kwargs[name] = default.dependency()
+        elif isinstance(default, params.Param):
+            if default.is_required():
+                return None
+            kwargs[name] = default.default
+        elif default is inspect.Parameter.empty:
+            return None
+        else:
+            kwargs[name] = default
+    return kwargs
+
+
+def build() -> Optional[Path]:
+    """Compute every registered endpoint's default payload for the loaded snapshot."""
+    import main  # noqa: F401  (importing the app registers every materialized endpoint)
+    from materialize import REGISTRY, query_key
+    from responses import dumps
+
+    STORE.mkdir(parents=True, exist_ok=True)
+    names = sorted({n for _, datasets in REGISTRY.values() for n in datasets})
+    sources = {}
+    for n in names:
+        if not deps.PATHS[n].exists():
+            continue
+        try:
+            sources[n] = deps.version(n)
+        except deps.DatasetUnavailable:
+            log.exception("skipping endpoints that read %s", n)
+    snapshot = hashlib.sha1(json.dumps(sources, sort_keys=True).encode()).hexdigest()[:12]
+
+    current = _load_manifest()
+    if current is not None and current["snapshot"] == snapshot:
+        log.info("aggregates for snapshot %s already built", snapshot)
+        return None
+
+    entries, chunks, offset = {}, [], 0
+    for endpoint, (fn, datasets) in sorted(REGISTRY.items()):
+        if not all(n in sources for n in datasets):
+            continue
+        kwargs = _default_kwargs(fn)
+        if kwargs is None:
+            continue
+        t0 = time.perf_counter()
+        try:
+            body = dumps(fn(**kwargs))
+        except Exception:
+            log.exception("building %s failed; it will be computed on request", endpoint)
+            continue
+        entries[entry_key(endpoint, query_key(kwargs))] = {
+            "offset": offset,
+            "length": len(body),
+            "sources": {n: sources[n] for n in datasets},
+        }
+        chunks.append(body)
+        offset += len(body)
+        log.info("built %s (%d bytes, %.0f ms)", endpoint, len(body), (time.perf_counter() - t0) * 1000)
+
+    artifact = STORE / f"{snapshot}.bin"
+    tmp = artifact.with_suffix(".tmp")
+    tmp.write_bytes(b"".join(chunks))
+    os.replace(tmp, artifact)
+
+    manifest = {
+        "snapshot": snapshot,
+        "artifact": artifact.name,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "sources": sources,
+        "entries": entries,
+    }
+    tmp = MANIFEST.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1))
+    os.replace(tmp, MANIFEST)
+
+    # keep the previous artifact for readers that still hold the old manifest
+    previous = current["artifact"] if current else None
+    for old in STORE.glob("*.bin"):
+        if old.name not in (artifact.name, previous):
+            old.unlink(missing_ok=True)
+    return artifact
+
+
+async def _watch(interval: float) -> None:
+    build()
+    while True:
+        await asyncio.sleep(interval)
+        if await asyncio.to_thread(deps.refresh):
+            await asyncio.to_thread(build)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Precompute dashboard aggregates for the current snapshot.")
+    parser.add_argument("--watch", action="store_true", help="keep running and rebuild after every sync")
+    parser.add_argument("--interval", type=float, default=deps.POLL_SECONDS)
+    args = parser.parse_args()
+
+    import main  # noqa: F401  (routers declare their columns before the first load)
+    # this service owns data/: every snapshot it loads is also written to deps.ARROW_DIR,
+    # which the API maps instead of decoding the parquet again
+    deps.WRITE_ARROW = True
+    deps.preload()
+    if args.watch:
+        asyncio.run(_watch(args.interval))
+    else:
+        build()
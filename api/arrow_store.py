@@ -0,0 +1,56 @@
+# arrow_store.py (parquet snapshots converted once to uncompressed Arrow IPC / Feather v2,
+# so loading a dataset is a memory map instead of a parquet decode)
+#
+# <store>/<parquet stem>.arrow holds every column of the parquet with deps' load-time
+# dtypes already applied, and records in its schema metadata the (mtime, size) of the
+# parquet it was converted from. Readers only use it while that still matches, map it,
+# and pick their columns: pages of columns (and rows) nobody touches stay on disk.
+import json
+import os
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+
+SOURCE_KEY = b"itcm.source"
+
+Signature = tuple[float, int]
+
+
+def path_for(parquet: Path, store: Path) -> Path:
+    return store / f"{parquet.stem}.arrow"
+
+
+def open_table(parquet: Path, store: Path, sig: Signature, columns: Optional[list[str]] = None) -> Optional[pa.Table]:
+    """The mapped table converted from snapshot `sig` of `parquet`, or None if there is none (yet)."""
+    try:
+        reader = ipc.open_file(pa.memory_map(str(path_for(parquet, store)), "r"))
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None
+    source = (reader.schema.metadata or {}).get(SOURCE_KEY)
+    if source is None or tuple(json.loads(source)) != tuple(sig):
+        return None
+    table = reader.read_all()
+    if columns is not None:
+        table = table.select([c for c in table.column_names if c in columns])
+    return table
+
+
+def convert(parquet: Path, store: Path, sig: Signature, prepare: Callable[[pd.DataFrame], pd.DataFrame]) -> Path:
+    """Write snapshot `sig` of `parquet`, passed through `prepare`, as uncompressed Feather v2."""
+    table = pa.Table.from_pandas(prepare(pd.read_parquet(parquet, engine="pyarrow")), preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_KEY: json.dumps(list(sig)).encode()})
+    store.mkdir(parents=True, exist_ok=True)
+    target = path_for(parquet, store)
+    tmp = target.with_suffix(f".tmp{os.getpid()}")
+    try:
+        feather.write_feather(table, str(tmp), compression="uncompressed")
+        # readers still mapping the previous file keep it until they swap
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return target
@@ -0,0 +1,288 @@
+# bench/run.py
+#
+#   cd api && python -m bench.run [--scale 1] [--data DIR] [--mode inprocess|http|both]
+#                                 [--requests 200] [--concurrency 8] [--save NAME] [--compare NAME]
+#
+# Drives every endpoint in ENDPOINTS and reports p50 / p99 latency, throughput and the
+# API's peak RSS. "inprocess" calls the ASGI app through httpx's ASGITransport (no
+# sockets, measures the app itself); "http" starts uvicorn on the same data (or uses
+# --url) and measures what a client sees. Without --data a synthetic dataset is
+# generated (bench/synthetic.py) at --scale into a temp dir, so runs are reproducible.
+#
+# --save NAME writes bench/baselines/NAME.json; --compare NAME prints the change per
+# endpoint against it and exits non-zero when a p50 got slower than --tolerance.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import numpy as np
+
+API_DIR = Path(__file__).resolve().parent.parent
+BASELINES = Path(__file__).resolve().parent / "baselines"
+
+# (method, path, json body); ids and labels match bench/synthetic.py output
+LOOKUP = {"product_ids": [str(100_000 + i) for i in range(50)]}
+ENDPOINTS = [
+    ("GET", "/health", None),
+    ("GET", "/countries", None),
+    ("GET", "/countries/segments", None),
+    ("GET", "/countries_by_revenue", None),
+    ("GET", "/countries_by_channel", None),
+    ("GET", "/countries_by_channel_by_month", None),
+    ("GET", "/cities_by_revenue", None),
+    ("GET", "/customers_age_gender", None),
+    ("GET", "/sales_month?start_month=2024-06", None),
+    ("GET", "/sales_month?start_month=2024-01&yoy=true", None),
+    ("GET", "/returning/", None),
+    ("GET", "/country/Denmark/top-cities?limit=10", None),
+    ("GET", "/country/Denmark/dashboard", None),
+    ("GET", "/top_brands_by_country/?country=Denmark", None),
+    ("GET", "/top_categories_by_season/?country=Denmark", None),
+    ("GET", "/top_products_by_season/?country=Denmark&season_label=Summer%202024", None),
+    ("GET", "/top_repurchase_by_country/?country=Denmark", None),
+    ("GET", "/complements?limit=1000", None),
+    ("GET", "/complements/100001", None),
+    ("POST", "/complements/lookup", LOOKUP),
+    ("GET", "/semantic_similarity_recs?limit=1000&include_scores=true", None),
+    ("GET", "/basket_cf/100001", None),
+    ("POST", "/basket_cf/score", {"product_ids": [str(100_000 + i) for i in range(0, 50, 10)], "k": 10}),
+    ("GET", "/top_same_brand?limit=1000", None),
+    ("GET", "/hybrid/100001", None),
+    ("GET", "/hybrid/100001?method=rrf&weights=complements:1,basket_cf:0.5", None),
+    ("POST", "/hybrid/blend", {**LOOKUP, "k": 10}),
+]
+
+
+async def _drive(client: httpx.AsyncClient, method: str, path: str, body, requests: int, concurrency: int) -> dict:
+    t0 = time.perf_counter()
+    first = await client.request(method, path, json=body)
+    first_ms = (time.perf_counter() - t0) * 1000
+
+    latencies: list[float] = []
+    errors = 0
+    size = len(first.content)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        nonlocal errors, size
+        async with sem:
+            t = time.perf_counter()
+            r = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - t)
+            errors += r.status_code >= 400
+            size = len(r.content)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        "status": first.status_code,
+        "first_ms": round(first_ms, 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "rps": round(requests / wall, 1),
+        "bytes": size,
+        "errors": errors,
+    }
+
+
+async def _run_all(client: httpx.AsyncClient, requests: int, concurrency: int, only: Optional[str]) -> dict:
+    results = {}
+    for method, path, body in ENDPOINTS:
+        if only and only not in path:
+            continue
+        key = f"{method} {path}"
+        results[key] = await _drive(client, method, path, body, requests, concurrency)
+        r = results[key]
+        print(f"  {key:<62}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['rps']:>9.0f}{r['bytes']:>11}"
+              + (f"  {r['errors']} errors (HTTP {r['status']})" if r["errors"] or r["status"] >= 400 else ""))
+    return results
+
+
+def _header(mode: str) -> None:
+    print(f"{mode}:\n  {'endpoint':<62}{'p50 ms':>9}{'p99 ms':>9}{'req/s':>9}{'bytes':>11}")
+
+
+def run_inprocess(requests: int, concurrency: int, only: Optional[str]) -> dict:
+    # DATA_DIR is already set; deps reads it on import
+    import deps
+    import main
+
+    t0 = time.perf_counter()
+    deps.preload()
+    load_s = time.perf_counter() - t0
+    _header("inprocess")
+
+    async def go():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await _run_all(client, requests, concurrency, only)
+
+    endpoints = asyncio.run(go())
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    return {"preload_s": round(load_s, 3), "peak_rss_mb": round(peak_kb / 1024, 1), "endpoints": endpoints}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _peak_rss_kb(pid: int) -> Optional[int]:
+    """VmHWM of `pid` plus its direct children (uvicorn workers); Linux only."""
+    def hwm(p: int) -> int:
+        for line in Path(f"/proc/{p}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+        return 0
+    try:
+        children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+        return hwm(pid) + sum(hwm(int(c)) for c in children)
+    except OSError:
+        return None
+
+
+def run_http(url: Optional[str], workers: int, requests: int, concurrency: int, only: Optional[str]) -> dict:
+    proc = None
+    if url is None:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=API_DIR, env=os.environ.copy(),
+        )
+    try:
+        deadline = time.monotonic() + 120
+        while True:
+            try:
+                if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if proc is not None and proc.poll() is not None:
+                raise SystemExit(f"uvicorn exited with {proc.returncode}")
+            if time.monotonic() > deadline:
+                raise SystemExit(f"{url} did not become healthy")
+            time.sleep(0.2)
+        _header(f"http ({url}, {workers} worker{'s' if workers > 1 else ''})")
+
+        async def go():
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+                return await _run_all(client, requests, concurrency, only)
+
+        endpoints = asyncio.run(go())
+        peak_kb = _peak_rss_kb(proc.pid) if proc is not None else None
+        return {"peak_rss_mb": None if peak_kb is None else round(peak_kb / 1024, 1), "endpoints": endpoints}
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> int:
+    """Print p50 / throughput change per endpoint; returns the number of p50 regressions."""
+    regressions = 0
+    for mode, result in current["modes"].items():
+        base = baseline["modes"].get(mode)
+        if base is None:
+            continue
+        print(f"{mode} vs baseline {baseline['meta']['name']!r}:")
+        for key, r in result["endpoints"].items():
+            b = base["endpoints"].get(key)
+            if b is None:
+                continue
+            change = r["p50_ms"] / b["p50_ms"] - 1 if b["p50_ms"] else 0.0
+            slower = change > tolerance
+            regressions += slower
+            print(f"  {key:<62}{b['p50_ms']:>9.2f} -> {r['p50_ms']:>8.2f} ms {change:>+7.0%}"
+                  + ("  REGRESSION" if slower else ""))
+        if result.get("peak_rss_mb") and base.get("peak_rss_mb"):
+            print(f"  peak RSS {base['peak_rss_mb']} -> {result['peak_rss_mb']} MB")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the API endpoints in-process and over HTTP.")
+    parser.add_argument("--data", type=Path, help="parquet directory (default: generate synthetic data)")
+    parser.add_argument("--scale", type=int, default=1, help="synthetic data scale when --data is not given")
+    parser.add_argument("--mode", choices=["inprocess", "http", "both"], default="both")
+    parser.add_argument("--url", help="benchmark an already running API instead of starting uvicorn")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for --mode http")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--only", help="only endpoints whose path contains this")
+    parser.add_argument("--save", metavar="NAME", help="write the results to bench/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare with bench/baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown for --compare")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.data is None:
+        tmp = tempfile.TemporaryDirectory(prefix=f"itcm-bench-{args.scale}x-")
+        args.data = Path(tmp.name)
+    # before anything imports deps, which reads DATA_DIR once
+    os.environ["DATA_DIR"] = str(args.data)
+    if tmp is not None:
+        from bench.synthetic import generate
+        t0 = time.perf_counter()
+        generate(args.data, args.scale)
+        print(f"generated {args.scale}x synthetic data in {time.perf_counter() - t0:.1f}s")
+    # keep the background reload and metrics headers out of the measurements
+    os.environ.setdefault("DATA_POLL_SECONDS", "3600")
+
+    result = {
+        "meta": {
+            "name": args.save,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "data": "synthetic" if tmp is not None else str(args.data),
+            "scale": args.scale if tmp is not None else None,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "machine": f"{platform.machine()}, {os.cpu_count()} cpus",
+        },
+        "modes": {},
+    }
+    try:
+        # http first: the in-process run imports the app (and its memory) into this process
+        if args.mode in ("http", "both"):
+            result["modes"]["http"] = run_http(args.url, args.workers, args.requests, args.concurrency, args.only)
+        if args.mode in ("inprocess", "both"):
+            result["modes"]["inprocess"] = run_inprocess(args.requests, args.concurrency, args.only)
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    for mode, r in result["modes"].items():
+        print(f"{mode}: peak RSS {r['peak_rss_mb']} MB")
+
+    status = 0
+    if args.compare:
+        baseline = json.loads((BASELINES / f"{args.compare}.json").read_text())
+        status = 1 if compare(result, baseline, args.tolerance) else 0
+    if args.save:
+        BASELINES.mkdir(exist_ok=True)
+        (BASELINES / f"{args.save}.json").write_text(json.dumps(result, indent=1) + "\n")
+        print(f"saved bench/baselines/{args.save}.json")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# bench/serialization.py
+#
+#   cd api && python -m bench.serialization [--rows 50000] [--repeat 5]
+#
+# Compares the old router path (df.to_dict + FastAPI's jsonable_encoder + JSONResponse)
+# with responses.dumps on a recommendation-shaped table ("Product ID", "Top 1..10",
+# optional "Score 1..10") and on a per-country payload with nested frames.
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from responses import dumps
+
+
+def rec_table(rows: int, scores: bool, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ids = np.arange(100_000, 100_000 + rows)
+    data = {"Product ID": ids.astype(str)}
+    for k in range(1, 11):
+        top = rng.choice(ids, rows).astype(str).astype(object)
+        top[rng.random(rows) < 0.05] = None
+        data[f"Top {k}"] = top
+        if scores:
+            data[f"Score {k}"] = rng.random(rows)
+    return pd.DataFrame(data)
+
+
+def _to_records(payload):
+    if isinstance(payload, pd.DataFrame):
+        return payload.to_dict(orient="records")
+    if isinstance(payload, dict):
+        return {k: _to_records(v) for k, v in payload.items()}
+    return payload
+
+
+def old_path(payload) -> bytes:
+    return JSONResponse(jsonable_encoder(_to_records(payload))).body
+
+
+def timed(fn, payload, repeat: int) -> tuple[float, int]:
+    best, size = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = len(fn(payload))
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare router JSON serialization paths.")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    brands = rec_table(args.rows // 10, scores=False).rename(columns={"Product ID": "brand"})
+    cases = {
+        "recs (strings)": rec_table(args.rows, scores=False),
+        "recs + scores": rec_table(args.rows, scores=True),
+        "nested frames": {"data": brands, "meta": {"rows": len(brands), "country": None}},
+    }
+
+    print(f"{'case':<16}{'old ms':>10}{'new ms':>10}{'speedup':>9}{'bytes':>12}")
+    for name, payload in cases.items():
+        old_ms, size = timed(old_path, payload, args.repeat)
+        new_ms, _ = timed(dumps, payload, args.repeat)
+        assert json.loads(old_path(payload)) == json.loads(dumps(payload)), name
+        print(f"{name:<16}{old_ms:>10.1f}{new_ms:>10.1f}{old_ms / new_ms:>8.1f}x{size:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# bench/synthetic.py
+#
+#   cd api && python -m bench.synthetic --out /tmp/itcm-data [--scale 1|10|100] [--seed 0]
+#
+# Writes a synthetic version of every parquet in deps.PATHS, with the columns the
+# routers read, so the API and the benchmarks run without the recommendation engine's
+# output. --scale multiplies customers, orders, products and cities per country and
+# widens the country list (1x: 4 countries, 10x: 12, 100x: 30). Point the API at it
+# with DATA_DIR=<out>.
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import deps
+
+COUNTRIES = [
+    "Denmark", "Finland", "Norway", "Sweden", "Germany", "Netherlands", "Belgium", "France",
+    "Spain", "Italy", "Poland", "Austria", "Switzerland", "Ireland", "Portugal", "Czechia",
+    "Estonia", "Latvia", "Lithuania", "Iceland", "Greece", "Hungary", "Slovakia", "Slovenia",
+    "Croatia", "Romania", "Bulgaria", "Luxembourg", "Malta", "Cyprus",
+]
+CHANNELS = ["Web", "App", "Store"]
+FIRST_MONTH, LAST_MONTH = "2023-01", "2025-08"
+TOP_N = 10
+
+
+class Sizes:
+    def __init__(self, scale: int):
+        self.countries = COUNTRIES[: {1: 4, 10: 12, 100: 30}.get(scale, min(len(COUNTRIES), 4 + scale // 4))]
+        self.customers = 20_000 * scale
+        self.products = 5_000 * scale
+        self.orders = 60_000 * scale
+        self.cities_per_country = 60 * scale
+        self.brands = 50 + 5 * scale
+        self.categories = 40 + scale
+
+
+def _popularity(rng: np.random.Generator, n: int, size: int, a: float = 1.2) -> np.ndarray:
+    """`size` draws from 0..n-1 with a long-tailed (Zipf-like) popularity, ids shuffled."""
+    weights = 1.0 / np.arange(1, n + 1) ** a
+    ranks = rng.choice(n, size=size, p=weights / weights.sum())
+    return rng.permutation(n)[ranks]
+
+
+def _cities(sz: Sizes) -> pd.DataFrame:
+    rows = [(c, f"{c[:3]}-City{i}") for c in sz.countries for i in range(sz.cities_per_country)]
+    rows += [(c, "Unknown") for c in sz.countries]
+    return pd.DataFrame(rows, columns=["country", "city"])
+
+
+def customers(rng, sz: Sizes, cities: pd.DataFrame) -> pd.DataFrame:
+    home = _popularity(rng, len(cities), sz.customers, a=0.9)
+    age = rng.normal(41, 14, sz.customers).clip(16, 95).round()
+    age[rng.random(sz.customers) < 0.03] = np.nan
+    gender = rng.choice(np.array(["Female", "Male", "Unknown", None], dtype=object), sz.customers, p=[0.55, 0.4, 0.03, 0.02])
+    return pd.DataFrame({
+        "customer_id": np.arange(1, sz.customers + 1),
+        "country": cities["country"].to_numpy()[home],
+        "city": cities["city"].to_numpy()[home],
+        "age": age,
+        "gender": gender,
+        "channel": rng.choice(CHANNELS, sz.customers, p=[0.6, 0.3, 0.1]),
+    })
+
+
+def orders(rng, sz: Sizes, cust: pd.DataFrame) -> pd.DataFrame:
+    who = _popularity(rng, len(cust), sz.orders, a=0.6)
+    start, end = pd.Timestamp(f"{FIRST_MONTH}-01"), pd.Period(LAST_MONTH, "M").end_time.normalize()
+    days = rng.integers(0, (end - start).days + 1, sz.orders)
+    return pd.DataFrame({
+        "order_id": np.arange(1, sz.orders + 1),
+        "customer_id": cust["customer_id"].to_numpy()[who],
+        "country": cust["country"].to_numpy()[who],
+        "city": cust["city"].to_numpy()[who],
+        "channel": rng.choice(CHANNELS, sz.orders, p=[0.6, 0.3, 0.1]),
+        "order_date": start + pd.to_timedelta(days, unit="D"),
+        "total_sek": rng.gamma(2.0, 350.0, sz.orders).round(2),
+    })
+
+
+def order_items(rng, ords: pd.DataFrame, product_ids: np.ndarray) -> pd.DataFrame:
+    per_order = rng.geometric(0.45, len(ords))
+    n = int(per_order.sum())
+    return pd.DataFrame({
+        "order_id": np.repeat(ords["order_id"].to_numpy(), per_order),
+        "product_id": product_ids[_popularity(rng, len(product_ids), n)],
+        "quantity": rng.geometric(0.7, n),
+        "price_sek": rng.gamma(2.0, 150.0, n).round(2),
+    })
+
+
+def articles(rng, sz: Sizes, product_ids: np.ndarray) -> pd.DataFrame:
+    n = len(product_ids)
+    return pd.DataFrame({
+        "product_id": product_ids,
+        "name": [f"Product {i}" for i in range(n)],
+        "brand": [f"Brand{b}" for b in _popularity(rng, sz.brands, n, a=0.8)],
+        "category": [f"Category{c}" for c in rng.integers(0, sz.categories, n)],
+        "group_id": (product_ids // 4).astype(str),
+        "price_sek": rng.gamma(2.0, 150.0, n).round(2),
+    })
+
+
+def customer_summary(cust: pd.DataFrame, ords: pd.DataFrame) -> pd.DataFrame:
+    counts = ords["customer_id"].value_counts()
+    n_orders = counts.reindex(cust["customer_id"], fill_value=0).to_numpy()
+    status = np.select([n_orders >= 5, n_orders >= 2], ["Loyal", "Returning"], "New")
+    spent = ords.groupby("customer_id")["total_sek"].sum().reindex(cust["customer_id"], fill_value=0).to_numpy()
+    return cust[["customer_id", "country", "city", "age", "gender"]].assign(
+        status=status, total_orders=n_orders, total_spent_sek=spent.round(2),
+    )[n_orders > 0].reset_index(drop=True)
+
+
+def city_summary(cust: pd.DataFrame, ords: pd.DataFrame, cities: pd.DataFrame) -> pd.DataFrame:
+    by_city = ords.groupby(["country", "city"]).agg(
+        total_revenue_sek=("total_sek", "sum"), total_orders=("order_id", "size"),
+    )
+    people = cust.groupby(["country", "city"]).size().rename("customers_count")
+    df = cities.set_index(["country", "city"]).join(people).join(by_city).fillna(0).reset_index()
+    df["customers_count"] = df["customers_count"].astype("int64")
+    df["total_orders"] = df["total_orders"].astype("int64")
+    df["avg_order_value_sek"] = (df["total_revenue_sek"] / df["total_orders"].replace(0, np.nan)).round()
+    return df
+
+
+def country_summary(city: pd.DataFrame) -> pd.DataFrame:
+    df = city.groupby("country", as_index=False)[["total_revenue_sek", "total_orders"]].sum()
+    df["avg_order_value_sek"] = (df["total_revenue_sek"] / df["total_orders"].replace(0, np.nan)).round()
+    return df
+
+
+def city_monthly_revenue(ords: pd.DataFrame) -> pd.DataFrame:
+    month = ords["order_date"].dt.to_period("M").astype(str)
+    return (
+        ords.assign(year_month=month)
+            .groupby(["country", "city", "year_month"], as_index=False)
+            .agg(total_revenue_sek=("total_sek", "sum"), total_orders=("order_id", "size"))
+    )
+
+
+def channels(cust: pd.DataFrame, ords: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    overall = cust.groupby(["country", "channel"], as_index=False).size().rename(columns={"size": "customers_count"})
+    monthly = (
+        ords.assign(year_month=ords["order_date"].dt.to_period("M").astype(str))
+            .groupby(["country", "channel", "year_month"])["customer_id"].nunique()
+            .rename("customers_count").reset_index()
+    )
+    return overall, monthly
+
+
+def return_buckets(rng, cust_summary: pd.DataFrame) -> pd.DataFrame:
+    buckets = ["0-30", "31-90", "91-180", "181-365", "365+"]
+    share = rng.dirichlet(np.ones(len(buckets)) * 3)
+    counts = np.round(share * len(cust_summary)).astype("int64")
+    return pd.DataFrame({"bucket": buckets, "customers": counts})
+
+
+def _ranked(df: pd.DataFrame, keys: list[str], value: str) -> pd.DataFrame:
+    df = df.sort_values([*keys, value], ascending=[True] * len(keys) + [False])
+    df["rank"] = df.groupby(keys).cumcount() + 1
+    return df[df["rank"] <= TOP_N].reset_index(drop=True)
+
+
+def top_tables(ords: pd.DataFrame, items: pd.DataFrame, arts: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    lines = items.merge(ords[["order_id", "customer_id", "country", "order_date"]], on="order_id").merge(
+        arts[["product_id", "name", "brand", "category", "group_id"]], on="product_id",
+    )
+    month = lines["order_date"].dt.month
+    year = lines["order_date"].dt.year
+    lines["season_label"] = np.where(month.between(4, 9), "Summer ", "Winter ") + year.astype(str)
+
+    brands = lines.groupby(["country", "brand"], as_index=False).size().rename(columns={"size": "count"})
+    cats = lines.groupby(["country", "season_label", "category"], as_index=False).size().rename(columns={"size": "count"})
+    groups = (
+        lines.groupby(["country", "season_label", "group_id"], as_index=False)
+             .agg(name=("name", "first"), brand=("brand", "first"), count=("order_id", "size"))
+             .rename(columns={"group_id": "value"})
+    )
+    bought = lines.groupby(["country", "group_id", "customer_id"]).size()
+    again = (
+        bought[bought > 1].reset_index().groupby(["country", "group_id"], as_index=False).size()
+              .rename(columns={"size": "repurchasers", "group_id": "value"})
+    )
+    names = arts.drop_duplicates("group_id").set_index("group_id")[["name", "brand"]]
+    again = again.join(names, on="value")
+    return {
+        "top_brands": _ranked(brands, ["country"], "count"),
+        "top_categories": _ranked(cats, ["country", "season_label"], "count"),
+        "top_groups": _ranked(groups, ["country", "season_label"], "count")[
+            ["country", "season_label", "name", "brand", "value", "count", "rank"]],
+        "top_repurchase": _ranked(again, ["country"], "repurchasers")[
+            ["country", "name", "value", "brand", "repurchasers", "rank"]],
+    }
+
+
+def recommendations(rng, product_ids: np.ndarray, coverage: float) -> pd.DataFrame:
+    """A "Product ID" / "Top 1..N" / "Score 1..N" table like the recommendation engine's."""
+    n = len(product_ids)
+    covered = rng.random(n) < coverage
+    covered[:100] = True  # bench/run.py looks these up
+    ids = product_ids[covered]
+    data = {"Product ID": ids.astype(str)}
+    scores = np.sort(rng.random((len(ids), TOP_N)), axis=1)[:, ::-1]
+    for k in range(TOP_N):
+        top = product_ids[_popularity(rng, n, len(ids), a=0.7)].astype(str).astype(object)
+        top[rng.random(len(ids)) < 0.02 * k] = None  # shorter lists leave the tail empty
+        data[f"Top {k + 1}"] = top
+        data[f"Score {k + 1}"] = np.where(pd.isna(top), np.nan, scores[:, k].round(6))
+    return pd.DataFrame(data)
+
+
+def generate(out: Path, scale: int = 1, seed: int = 0) -> dict[str, int]:
+    """Write every dataset of deps.PATHS under `out`; returns rows per dataset."""
+    rng = np.random.default_rng(seed)
+    sz = Sizes(scale)
+    out.mkdir(parents=True, exist_ok=True)
+
+    cities = _cities(sz)
+    product_ids = np.arange(100_000, 100_000 + sz.products)
+    cust = customers(rng, sz, cities)
+    ords = orders(rng, sz, cust)
+    items = order_items(rng, ords, product_ids)
+    arts = articles(rng, sz, product_ids)
+    summary = customer_summary(cust, ords)
+    city = city_summary(cust, ords, cities)
+    by_channel, by_channel_month = channels(cust, ords)
+
+    frames = {
+        "customers": cust,
+        "transactions": items.merge(ords[["order_id", "customer_id", "order_date", "channel"]], on="order_id"),
+        "articles": arts,
+        "orders": ords,
+        "order_items": items,
+        "customer_summary": summary,
+        "country_summary": country_summary(city),
+        "city_summary": city,
+        "city_monthly_revenue": city_monthly_revenue(ords),
+        "countries_by_channel": by_channel,
+        "countries_by_channel_by_month": by_channel_month,
+        "return_buckets": return_buckets(rng, summary),
+        **top_tables(ords, items, arts),
+        "complements": recommendations(rng, product_ids, 0.8),
+        "semantic_similarity_recs": recommendations(rng, product_ids, 0.95),
+        "basket_cf": recommendations(rng, product_ids, 0.6),
+        "top_same_brand": recommendations(rng, product_ids, 0.9),
+        "hybrid": recommendations(rng, product_ids, 0.9),
+    }
+    missing = set(deps.PATHS) - set(frames)
+    assert not missing, f"no generator for {sorted(missing)}"
+
+    for name, df in frames.items():
+        df.to_parquet(out / deps.PATHS[name].name, index=False)
+    return {name: len(df) for name, df in frames.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write synthetic parquet files for every dataset the API serves.")
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--scale", type=int, default=1, help="1, 10 or 100 (any positive integer works)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    rows = generate(args.out, args.scale, args.seed)
+    for name, n in rows.items():
+        print(f"{deps.PATHS[name].name:<45}{n:>12,}")
+    print(f"scale {args.scale}x written to {args.out} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
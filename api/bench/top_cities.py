@@ -0,0 +1,96 @@
+# bench/top_cities.py
+#
+#   cd api && python -m bench.top_cities [--cities 200000] [--countries 40] [--repeat 5]
+#
+# Compares the previous cities_by_revenue body (regex filter + groupby.apply(nlargest)
+# + a groupby loop) with the TopK version on a synthetic city_summary, with the
+# load-time dtypes (country / city as categoricals).
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from routers.cities_by_revenue import cities_by_revenue
+
+
+def city_table(cities: int, countries: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    city = np.array([f"City{i}" for i in range(cities)], dtype=object)
+    city[rng.random(cities) < 0.01] = "Unknown"
+    df = pd.DataFrame({
+        "country": [f"Country{i}" for i in rng.integers(0, countries, cities)],
+        "city": city,
+        "total_revenue_sek": rng.gamma(2.0, 50_000, cities),
+        "total_orders": rng.integers(1, 500, cities),  # the old path can't divide by zero orders
+    })
+    df["country"] = df["country"].astype("category")
+    df["city"] = df["city"].astype("category")
+    return df
+
+
+def old_path(df: pd.DataFrame, k: int = 10) -> dict:
+    df = df.loc[
+        ~df["city"].str.contains("unknown", case=False, na=False),
+        ["country", "city", "total_revenue_sek", "total_orders"],
+    ]
+    agg = df.groupby(["country", "city"], as_index=False, observed=True).sum(numeric_only=True)
+    agg["ksek"] = (agg["total_revenue_sek"] / 1000).round().astype("int64")
+    agg["avg_order_value_sek"] = (
+        agg["total_revenue_sek"].div(agg["total_orders"].replace(0, pd.NA)).round().astype("Int64")
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        top = (
+            agg.groupby("country", group_keys=False, observed=True)
+               .apply(lambda g: g.nlargest(k, "ksek"))
+               .reset_index(drop=True)
+        )
+    return {
+        "top_cities_by_revenue_ksek": {
+            country: g[["city", "ksek", "avg_order_value_sek"]]
+            for country, g in top.groupby("country", observed=True)
+        }
+    }
+
+
+def new_path(df: pd.DataFrame, k: int = 10) -> dict:
+    return cities_by_revenue.__wrapped__(df, k=k, country=None)
+
+
+def timed(fn, df: pd.DataFrame, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def same(a: dict, b: dict) -> bool:
+    a, b = a["top_cities_by_revenue_ksek"], b["top_cities_by_revenue_ksek"]
+    return list(a) == list(b) and all(
+        a[c].reset_index(drop=True).astype(object).equals(b[c].reset_index(drop=True).astype(object))
+        for c in a
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare cities_by_revenue top-k implementations.")
+    parser.add_argument("--cities", type=int, default=200_000)
+    parser.add_argument("--countries", type=int, nargs="+", default=[3, 40, 400])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'cities':>8}{'countries':>11}{'old ms':>10}{'new ms':>10}{'speedup':>9}")
+    for countries in args.countries:
+        df = city_table(args.cities, countries)
+        assert same(old_path(df), new_path(df)), countries
+        old_ms = timed(old_path, df, args.repeat)
+        new_ms = timed(new_path, df, args.repeat)
+        print(f"{args.cities:>8}{countries:>11}{old_ms:>10.1f}{new_ms:>10.1f}{old_ms / new_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# blend.py (request-time fusion of the "Product ID" / "Top N" recommendation tables:
+# every source re-coded onto one integer product vocabulary, so a blend with any
+# weights is a gather, a bincount and one sort)
+import re
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import deps
+from recs import KEY, key_strings
+
+SOURCES = {
+    "complements": deps.get_complements_df,
+    "semantic_similarity_recs": deps.get_semantic_similarity_recs_df,
+    "basket_cf": deps.get_basket_cf_df,
+    "top_same_brand": deps.get_top_same_brand_df,
+}
+METHODS = ("weighted", "rrf")
+
+
+def _numbered(columns, prefix: str) -> dict[int, str]:
+    """{n: "<prefix> n"} for the columns that have that form."""
+    return {int(m.group(1)): c for c in columns if (m := re.fullmatch(rf"{prefix} (\d+)", str(c)))}
+
+
+class Source:
+    """
+    One table over vocabulary codes: `row_of[code]` is the product's row (-1 if it has
+    none; the first row wins), `recs[row]` its top list (-1 for empty slots) and
+    `norm[row]` the list's scores divided by the row's best score (0 where missing).
+    """
+
+    def __init__(self, row_of: np.ndarray, recs: np.ndarray, norm: np.ndarray):
+        self.row_of, self.recs, self.norm = row_of, recs, norm
+
+
+class Blender:
+    def __init__(self, tables: dict[str, pd.DataFrame]):
+        layout = []
+        for name, df in tables.items():
+            tops = _numbered(df.columns, "Top")
+            layout.append((name, df, [tops[n] for n in sorted(tops)], sorted(tops)))
+
+        # one vocabulary over every key and every recommended id of every table
+        ids = pd.concat(
+            [key_strings(df[c]) for _, df, top_cols, _ in layout for c in [KEY, *top_cols]],
+            ignore_index=True,
+        ).astype("string[pyarrow]")
+        codes, vocab = pd.factorize(ids.mask(ids == ""))
+        self.vocab = pd.Index(vocab.astype(str))
+        n_codes = len(self.vocab)
+
+        self.sources: dict[str, Source] = {}
+        offset = 0
+        for name, df, top_cols, numbers in layout:
+            rows = len(df)
+            block = codes[offset:offset + rows * (1 + len(top_cols))].reshape(1 + len(top_cols), rows)
+            offset += block.size
+            keys, recs = block[0], block[1:].T.astype(np.int32)
+
+            row_of = np.full(n_codes, -1, dtype=np.int32)
+            present, first = np.unique(keys, return_index=True)
+            row_of[present[present >= 0]] = first[present >= 0]
+
+            scores = np.column_stack([
+                pd.to_numeric(df[f"Score {n}"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                if f"Score {n}" in df.columns else np.full(rows, np.nan)
+                for n in numbers
+            ]) if numbers else np.empty((rows, 0))
+            scores[recs < 0] = np.nan
+            best = np.max(np.where(np.isnan(scores), -np.inf, scores), axis=1, initial=-np.inf)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                norm = np.where(best[:, None] > 0, scores / best[:, None], 0.0)
+            self.sources[name] = Source(row_of, recs, np.nan_to_num(norm, nan=0.0))
+
+    def blend(
+        self,
+        product_ids: list[str],
+        weights: dict[str, float],
+        k: int,
+        method: str = "weighted",
+        rrf_k: int = 60,
+    ) -> list[Optional[list[dict]]]:
+        """
+        Top `k` fused recommendations for each of `product_ids`, or None for ids no
+        source has a row for. "weighted" sums weight x normalized score over the
+        sources; "rrf" sums weight / (rrf_k + rank). The product itself is never
+        returned; ties are broken by vocabulary order, so results are deterministic.
+        """
+        codes = self.vocab.get_indexer([p.strip() for p in product_ids])
+        n_codes = len(self.vocab)
+        names = list(weights)
+
+        batch, cand, value, source = [], [], [], []
+        known = np.zeros(len(codes), dtype=bool)
+        for i, name in enumerate(names):
+            src = self.sources.get(name)
+            if src is None:
+                continue
+            rows = np.where(codes >= 0, src.row_of[np.maximum(codes, 0)], -1)
+            hit = np.flatnonzero(rows >= 0)
+            known[hit] = True
+            if weights[name] == 0 or len(hit) == 0 or src.recs.shape[1] == 0:
+                continue
+            recs = src.recs[rows[hit]]
+            if method == "rrf":
+                contrib = np.broadcast_to(1.0 / (rrf_k + np.arange(1, recs.shape[1] + 1)), recs.shape)
+            else:
+                contrib = src.norm[rows[hit]]
+            b = np.repeat(hit, recs.shape[1])
+            c = recs.ravel()
+            ok = (c >= 0) & (c != codes[b])
+            batch.append(b[ok])
+            cand.append(c[ok])
+            value.append(weights[name] * contrib.ravel()[ok])
+            source.append(np.full(int(ok.sum()), 1 << i, dtype=np.int64))
+
+        results: list[Optional[list[dict]]] = [[] if ok else None for ok in known]
+        if not batch:
+            return results
+
+        pair, inverse = np.unique(np.concatenate(batch).astype(np.int64) * n_codes + np.concatenate(cand),
+                                  return_inverse=True)
+        score = np.bincount(inverse, weights=np.concatenate(value), minlength=len(pair))
+        mask = np.zeros(len(pair), dtype=np.int64)
+        np.bitwise_or.at(mask, inverse, np.concatenate(source))
+
+        # by query, then score descending, then code; keep the first k of each query
+        b, c = pair // n_codes, pair % n_codes
+        order = np.lexsort((c, -score, b))
+        b, c, score, mask = b[order], c[order], score[order], mask[order]
+        starts = np.searchsorted(b, np.arange(len(codes)))
+        keep = (np.arange(len(b)) - starts[b] < k) & (score > 0)
+        labels = self.vocab[c[keep]]
+
+        for q, label, s, m in zip(b[keep].tolist(), labels, score[keep].tolist(), mask[keep].tolist()):
+            results[q].append({
+                "product_id": label,
+                "score": s,
+                "sources": [n for i, n in enumerate(names) if m >> i & 1],
+            })
+        return results
+
+
+# (versions of the sources it was built from, blender); rebuilt when any of them changes
+_cached: tuple[Optional[tuple], Optional[Blender]] = (None, None)
+_lock = Lock()
+
+
+def source_versions() -> tuple:
+    """(name, snapshot version) of the sources deps can serve; the others sit the blend out."""
+    versions = []
+    for name in SOURCES:
+        try:
+            versions.append((name, deps.version(name)))
+        except deps.DatasetUnavailable:
+            continue
+    return tuple(versions)
+
+
+def get_blender() -> Blender:
+    """The blender over every available source; its `sources` are the ones a blend can weight."""
+    global _cached
+    versions = source_versions()
+    if _cached[0] == versions:
+        return _cached[1]
+    with _lock:
+        if _cached[0] != versions:
+            _cached = (versions, Blender({n: SOURCES[n]() for n, _ in versions}))
+        return _cached[1]
@@ -0,0 +1,229 @@
+# compression.py (zstd / brotli / gzip response compression, with bodies cached per ETag)
+import os
+import zlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip/zstd are offered without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: only gzip/br are offered without it
+    zstandard = None
+
+MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+CACHE_BYTES = int(os.getenv("COMPRESS_CACHE_BYTES", str(64 * 1024 * 1024)))
+COMPRESSIBLE = (
+    "application/json",
+    "application/x-ndjson",
+    "application/vnd.apache.arrow.stream",
+    "text/",
+)
+
+
+class _Gzip:
+    def __init__(self):
+        self._c = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._c = brotli.Compressor(quality=5)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._c = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data) + self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+# server preference, best ratio/speed first
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = _Zstd
+if brotli is not None:
+    ENCODERS["br"] = _Brotli
+ENCODERS["gzip"] = _Gzip
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    for name in ENCODERS:
+        if name in accepted or "*" in accepted:
+            return name
+    return None
+
+
+def encoded_etag(tag: str, encoding: str) -> str:
+    return tag[:-1] + f"-{encoding}" + '"'
+
+
+def strip_encoding(tag: str) -> str:
+    """Inverse of encoded_etag, so If-None-Match from a compressed response still matches."""
+    for name in ENCODERS:
+        suffix = f'-{name}"'
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)] + '"'
+    return tag
+
+
+class _BodyCache:
+    """Compressed bodies keyed by (ETag, encoding), LRU-bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[tuple[str, str], bytes]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            body = self._items.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items.move_to_end(key)
+            return body
+
+    def put(self, key, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+body_cache = _BodyCache(CACHE_BYTES)
+
+
+@metrics.collector
+def _collect():
+    yield from metrics.gauge("api_compressed_cache_bytes", "Bytes held in the compressed body cache.",
+                             [({}, body_cache.size)])
+    yield from metrics.gauge("api_compressed_cache_lookups_total", "Compressed body cache lookups.",
+                             [({"result": "hit"}, body_cache.hits), ({"result": "miss"}, body_cache.misses)],
+                             kind="counter")
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON / NDJSON / Arrow responses of at least MIN_SIZE bytes with the best
+    encoding the client accepts. Streamed responses are compressed chunk by chunk.
+    Whole bodies that carry an ETag (see http_cache) are compressed once per
+    (ETag, encoding), i.e. once per dataset version, and served from body_cache after.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def send_compressed(message):
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            compressor = state["compressor"]
+
+            if compressor is None:
+                start = state["start"]
+                headers = MutableHeaders(scope=start)
+                eligible = (
+                    start["status"] == 200
+                    and "content-encoding" not in headers
+                    and headers.get("content-type", "").startswith(COMPRESSIBLE)
+                    and (more or len(body) >= MIN_SIZE)
+                )
+                if not eligible:
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                tag = headers.get("etag")
+                if tag is not None:
+                    headers["etag"] = encoded_etag(tag, encoding)
+
+                if not more:
+                    key = (tag, encoding)
+                    compressed = body_cache.get(key) if tag is not None else None
+                    if compressed is None:
+                        with metrics.phase("compress"):
+                            c = ENCODERS[encoding]()
+                            compressed = c.compress(body) + c.finish()
+                        if tag is not None:
+                            body_cache.put(key, compressed)
+                    headers["content-length"] = str(len(compressed))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                del headers["content-length"]
+                compressor = state["compressor"] = ENCODERS[encoding]()
+                await send(start)
+
+            with metrics.phase("compress"):
+                chunk = compressor.compress(body) if body else b""
+                if not more:
+                    chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,160 @@
+# cooccurrence.py (product x product co-occurrence counts over order_items as a sparse
+# CSR matrix, built as deps loads each snapshot and extended when a sync only appended
+# orders)
+import logging
+import time
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import deps
+
+log = logging.getLogger(__name__)
+
+NAME = "order_items"
+ORDER, PRODUCT = "order_id", "product_id"
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(df[[ORDER, PRODUCT]], index=False).to_numpy()
+
+
+def _fingerprint(hashes: np.ndarray) -> int:
+    # order-sensitive: row i's hash is mixed with its position
+    return int(np.bitwise_xor.reduce(hashes * (np.arange(len(hashes), dtype=np.uint64) * 2 + 1))) if len(hashes) else 0
+
+
+def _pairs(order_codes: np.ndarray, product_codes: np.ndarray, n_products: int) -> sp.csr_matrix:
+    """X^T X of the order x product incidence matrix X (a product counts once per order)."""
+    n_orders = int(order_codes.max()) + 1 if len(order_codes) else 0
+    x = sp.csr_matrix(
+        (np.ones(len(order_codes), dtype=np.int32), (order_codes, product_codes)),
+        shape=(n_orders, n_products),
+    )
+    x.data[:] = 1  # repeated lines of one product in an order were summed above
+    return (x.T @ x).tocsr()
+
+
+class CoOccurrence:
+    """
+    counts[i, j] = number of orders containing both product i and product j, with the
+    number of orders containing i on the diagonal. Products are coded in first-seen
+    order, so orders appended by a later snapshot only ever add codes at the end.
+    """
+
+    def __init__(self, products: pd.Index, counts: sp.csr_matrix, rows: int, fingerprint: int, last_order):
+        self.products = products
+        self.counts = counts
+        self.freq = counts.diagonal().astype(np.float64)
+        self.rows, self.fingerprint, self.last_order = rows, fingerprint, last_order
+        # request ids are strings; 123 and "123" address the same product
+        self._lookup = pd.Index(products.astype(str))
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "CoOccurrence":
+        hashes = _row_hashes(df)
+        orders, _ = pd.factorize(df[ORDER])
+        products, labels = pd.factorize(df[PRODUCT])
+        ok = (orders >= 0) & (products >= 0)
+        counts = _pairs(orders[ok], products[ok], len(labels))
+        return cls(pd.Index(labels), counts, len(df), _fingerprint(hashes), _last_order(df))
+
+    def extend(self, df: pd.DataFrame) -> Optional["CoOccurrence"]:
+        """
+        This matrix plus the orders `df` appends to the rows it was built from: X^T X
+        of the new orders only, added to the counts. None when `df` is not such an
+        append (rows changed, or lines were added to an order that already existed).
+        """
+        if len(df) < self.rows or self.last_order is None:
+            return None
+        hashes = _row_hashes(df)
+        if _fingerprint(hashes[:self.rows]) != self.fingerprint:
+            return None
+        new = df.iloc[self.rows:]
+        if len(new) == 0:
+            return self
+        orders = new[ORDER]
+        if not pd.api.types.is_numeric_dtype(orders) or not (orders.dropna() > self.last_order).all():
+            return None
+
+        order_codes, _ = pd.factorize(orders)
+        product_codes = self.products.get_indexer(new[PRODUCT])
+        unseen = pd.unique(new[PRODUCT][(product_codes < 0) & new[PRODUCT].notna().to_numpy()])
+        products = self.products.append(pd.Index(unseen)) if len(unseen) else self.products
+        if len(unseen):
+            product_codes = products.get_indexer(new[PRODUCT])
+        ok = (order_codes >= 0) & (product_codes >= 0)
+
+        n = len(products)
+        old = self.counts
+        # same data / indices, with empty rows for the new products: no copy before the add
+        padded = sp.csr_matrix(
+            (old.data, old.indices, np.concatenate([old.indptr, np.full(n - old.shape[0], old.indptr[-1])])),
+            shape=(n, n),
+        )
+        counts = (padded + _pairs(order_codes[ok], product_codes[ok], n)).tocsr()
+        return CoOccurrence(products, counts, len(df), _fingerprint(hashes), _last_order(df))
+
+    def score(self, product_ids: list[str], k: int) -> tuple[list[dict], list[str]]:
+        """
+        Top `k` products for a basket: sum over its products b of P(j | b), the share
+        of b's orders that also contain j. Basket products are never suggested. Ties
+        go to the product seen first. Returns (rows, ids not found in order_items).
+        """
+        ids = [p.strip() for p in product_ids]
+        codes = self._lookup.get_indexer(ids)
+        missing = [p for p, c in zip(product_ids, codes) if c < 0]
+        basket = np.unique(codes[codes >= 0])
+        if len(basket) == 0:
+            return [], missing
+
+        # one sparse mat-vec over the basket's rows: a dense score per product
+        scores = self.counts[basket].T @ (1.0 / self.freq[basket])
+        scores[basket] = 0.0
+        candidates = np.flatnonzero(scores)
+        scores = scores[candidates]
+
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.lexsort((candidates, -scores))
+        labels = self._lookup[candidates[order]]
+        return [{"product_id": p, "score": float(s)} for p, s in zip(labels, scores[order])], missing
+
+
+def _last_order(df: pd.DataFrame):
+    orders = df[ORDER]
+    if not pd.api.types.is_numeric_dtype(orders) or orders.isna().all():
+        return None
+    return orders.max()
+
+
+# the engine of the previous snapshot, which the next one is extended from
+_latest: Optional[CoOccurrence] = None
+_lock = Lock()
+
+
+def _next(df: pd.DataFrame) -> CoOccurrence:
+    global _latest
+    with _lock:
+        started = time.perf_counter()
+        engine = _latest.extend(df) if _latest is not None else None
+        how = "extended" if engine is not None else "built"
+        if engine is None:
+            engine = CoOccurrence.build(df)
+        _latest = engine
+    log.info("co-occurrence %s: %d products, %d pairs, %d order lines in %.2fs",
+             how, len(engine.products), engine.counts.nnz, engine.rows, time.perf_counter() - started)
+    return engine
+
+
+# build (or extend) the engine as each order_items snapshot is loaded, off the request
+# path; registered on import, so any preload() (lifespan, bench, aggregates) builds it
+deps.on_load(NAME, "cooccurrence", _next)
+
+
+def get_engine() -> CoOccurrence:
+    return deps.derived(NAME, "cooccurrence")
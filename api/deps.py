@@ -1,9 +1,33 @@
-# deps.py (better: cached, auto-invalidate on mtime, simple API)
-from functools import lru_cache
+# deps.py (preloaded at startup, reloaded in the background on mtime change, simple API)
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from itertools import islice
 from pathlib import Path
+from threading import RLock
+from typing import Callable, Optional
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-DATA = Path("/app/data")
+import arrow_store
+import metrics
+import shm
+
+log = logging.getLogger(__name__)
+
+DATA = Path(os.getenv("DATA_DIR", "/app/data"))
+POLL_SECONDS = float(os.getenv("DATA_POLL_SECONDS", "30"))
+# Feather copies of the parquet snapshots (see arrow_store.py); written by the process
+# that owns DATA (aggregates.py sets WRITE_ARROW), mapped by everyone
+ARROW_DIR = DATA / "arrow"
+WRITE_ARROW = False
+# resident DataFrame budget in bytes; 0 = unbounded
+MAX_BYTES = int(os.getenv("DATA_CACHE_MAX_BYTES", "0"))
 
 PATHS = {
     "customers":                 DATA / "customers_clean.parquet",
@@ -29,16 +53,388 @@ PATHS = {
     "hybrid":        DATA / "hybrid_pairs.parquet",
 }
 
-def _key(path: Path) -> tuple[str, float]:
+# load-time dtype policy: low-cardinality labels become categoricals (group with
+# observed=True), null-free text becomes pyarrow-backed strings, year_month becomes a
+# monthly Period, and int64 columns are narrowed to int32 when the values fit
+CATEGORICAL = {"country", "city", "channel", "gender", "status"}
+PERIOD_M = {"year_month"}
+
+# dataset -> columns declared by the endpoints that read it (see require());
+# datasets nobody declared for are loaded with every column
+_required: dict[str, set[str]] = {}
+
+def require(name: str, *columns: str) -> None:
+    """
+    Declare the columns an endpoint reads from dataset `name`. Only the union of the
+    declared columns is loaded, and every endpoint shares that one projected frame.
+    Call at import time, next to the router definition.
+    """
+    cols = _required.setdefault(name, set())
+    missing = set(columns) - cols
+    cols.update(columns)
+    if missing and name in _snapshots and not missing <= set(_snapshots[name][1].columns):
+        _evict(name)  # loaded before this declaration; reload with the wider projection
+
+def _optimize(df: pd.DataFrame) -> pd.DataFrame:
+    for col in df.columns:
+        s = df[col]
+        if col in CATEGORICAL:
+            df[col] = s.astype("category")
+        elif col in PERIOD_M and not isinstance(s.dtype, pd.PeriodDtype):
+            # nulls (and unparsable months) become NaT instead of the string "None"
+            df[col] = pd.to_datetime(s, errors="coerce").dt.to_period("M")
+        elif s.dtype == object and s.notna().all() and pd.api.types.infer_dtype(s) == "string":
+            # columns with nulls stay object so records keep serializing them as null
+            df[col] = s.astype("string[pyarrow]")
+        elif s.dtype == np.int64 and len(s) and np.iinfo(np.int32).min <= s.min() and s.max() <= np.iinfo(np.int32).max:
+            df[col] = s.astype(np.int32)
+    return df
+
+def _arrow_table(name: str, sig: tuple[float, int]) -> Optional[pa.Table]:
+    """The snapshot's Feather copy in ARROW_DIR, mapped and projected; converted first if this process writes them."""
+    path, columns = PATHS[name], _required.get(name)
+    table = arrow_store.open_table(path, ARROW_DIR, sig, columns)
+    if table is None and WRITE_ARROW:
+        try:
+            arrow_store.convert(path, ARROW_DIR, sig, _optimize)
+        except OSError:
+            log.exception("converting %s to %s failed", name, ARROW_DIR)
+            return None
+        table = arrow_store.open_table(path, ARROW_DIR, sig, columns)
+    return table
+
+def _shared_table(name: str, sig: tuple[float, int]) -> pa.Table:
+    """The snapshot as a table mapped from shm.SHM_DIR, converted by whichever worker got there first."""
+    columns = sorted(_required[name]) if name in _required else None
+    return shm.table(name, sig, columns, lambda: pa.Table.from_pandas(_read_parquet(name), preserve_index=False))
+
+def _from_table(table: pa.Table) -> pd.DataFrame:
+    # numeric, datetime and categorical-code columns stay views of the mapping
+    df = table.to_pandas(split_blocks=True)
+    # the pandas metadata only says "string", which to_pandas restores python-backed;
+    # wrap the mapped column instead, as _optimize's string[pyarrow]
+    for i, t in enumerate(df.dtypes):
+        if isinstance(t, pd.StringDtype) and t.storage == "python":
+            df.isetitem(i, pd.Series(pd.arrays.ArrowStringArray(table.column(i)), index=df.index))
+    return df
+
+def _read_parquet(name: str) -> pd.DataFrame:
+    path = PATHS[name]
+    columns = None
+    if name in _required:
+        columns = [c for c in pq.read_schema(path).names if c in _required[name]]
+    return _optimize(pd.read_parquet(path, columns=columns, engine="pyarrow"))
+
+def _signature(path: Path) -> tuple[float, int]:
     s = path.stat()
-    return (str(path), s.st_mtime)
+    return (s.st_mtime, s.st_size)
+
+class DatasetUnavailable(RuntimeError):
+    """A dataset that is not resident could not be loaded (missing, partial or unreadable file)."""
+
+# name -> (mtime, df); replaced wholesale on reload so readers never see a partial swap
+_snapshots: dict[str, tuple[float, pd.DataFrame]] = {}
+# name -> file signature seen on the previous poll but not loaded yet
+_pending: dict[str, tuple[float, int]] = {}
+# name -> signature of the file that failed to load (None: there was no file), for
+# datasets preload or an on-demand load couldn't load; unavailable until refresh()
+# loads a settled file
+_absent: dict[str, Optional[tuple[float, int]]] = {}
+# (name, key) -> (mtime, object built from that snapshot), see derive()
+_derived: dict[tuple[str, str], tuple[float, object]] = {}
+# name -> {key: build}: derived objects built by _load itself, see on_load()
+_on_load: dict[str, dict[str, Callable[[pd.DataFrame], object]]] = {}
+_load_lock = RLock()
+
+# bookkeeping for the byte budget and cache_stats()
+_sizes: dict[str, int] = {}
+_derived_sizes: dict[tuple[str, str], int] = {}
+_sources: dict[str, str] = {}   # "arrow", "shm" or "parquet": where the snapshot was loaded from
+_last_used: dict[str, float] = {}
+_hits: Counter = Counter()
+_misses: Counter = Counter()
+
+_SAMPLE = 64
+
+def _nbytes(obj, seen: set) -> int:
+    """
+    Approximate heap size of a derived object: frames, arrays and tables, walked through
+    containers and instance attributes. Objects in `seen` (e.g. the snapshot's own frame)
+    count once; large containers are estimated from a sample of their items.
+    """
+    if id(obj) in seen or obj is None or isinstance(obj, type) or callable(obj):
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, (pa.Table, pa.Array, pa.ChunkedArray)):
+        return obj.nbytes
+    if isinstance(obj, np.ndarray):
+        if obj.dtype != object or not obj.size:
+            return obj.nbytes
+        sample = obj.ravel()[:_SAMPLE].tolist()
+        return obj.nbytes + sum(map(sys.getsizeof, sample)) * obj.size // len(sample)
+    if isinstance(obj, dict):
+        if not obj:
+            return sys.getsizeof(obj)
+        sample = list(islice(obj.items(), _SAMPLE))
+        items = sum(_nbytes(k, seen) + _nbytes(v, seen) for k, v in sample)
+        return sys.getsizeof(obj) + items * len(obj) // len(sample)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        if not obj:
+            return sys.getsizeof(obj)
+        sample = list(islice(obj, _SAMPLE))
+        return sys.getsizeof(obj) + sum(_nbytes(v, seen) for v in sample) * len(obj) // len(sample)
+    if hasattr(obj, "__dict__"):
+        return sys.getsizeof(obj) + _nbytes(vars(obj), seen)
+    return sys.getsizeof(obj)
+
+def _put_derived(name: str, key: str, version: float, obj, df: Optional[pd.DataFrame]) -> None:
+    """Publish `obj` built from snapshot `version`; counted against the budget unless `df` is None (a mapping)."""
+    _derived[(name, key)] = (version, obj)
+    if df is None:
+        _derived_sizes.pop((name, key), None)
+    else:
+        _derived_sizes[(name, key)] = _nbytes(obj, {id(df)})
 
-@lru_cache(maxsize=None)
-def _read_cached(path_str: str, mtime: float) -> pd.DataFrame:
-    return pd.read_parquet(path_str, engine="pyarrow")
+def _drop_derived(name: str, before: Optional[float] = None) -> None:
+    """Release what was derived from dataset `name` (only from versions older than `before`, if given)."""
+    for key in [k for k, (v, _) in _derived.items() if k[0] == name and (before is None or v < before)]:
+        _derived.pop(key, None)
+        _derived_sizes.pop(key, None)
+
+def _resident_bytes() -> int:
+    return sum(_sizes.values()) + sum(_derived_sizes.values())
+
+def _evict(name: str) -> None:
+    _snapshots.pop(name, None)
+    _sizes.pop(name, None)
+    _drop_derived(name)
+
+def _enforce_budget(keep: str) -> None:
+    if not MAX_BYTES:
+        return
+    victims = sorted((n for n in _snapshots if n != keep), key=lambda n: _last_used.get(n, 0.0))
+    while _resident_bytes() > MAX_BYTES and victims:
+        victim = victims.pop(0)
+        log.info("evicting %s (%d bytes with what was derived from it) to stay under %d bytes",
+                 victim, _sizes[victim] + sum(b for k, b in _derived_sizes.items() if k[0] == victim), MAX_BYTES)
+        _evict(victim)
+
+def _load(name: str, sig: Optional[tuple[float, int]] = None) -> tuple[float, pd.DataFrame]:
+    sig = sig or _signature(PATHS[name])
+    mtime = sig[0]
+    started = time.perf_counter()
+    table, source = _arrow_table(name, sig), "arrow"
+    if table is None and shm.enabled():
+        source = "shm"
+        try:
+            table = _shared_table(name, sig)
+        except OSError:
+            # e.g. SHM_DIR full: this process keeps a private copy instead
+            log.exception("sharing %s through %s failed; reading it privately", name, shm.SHM_DIR)
+    if table is None:
+        source = "parquet"
+    if table is not None:
+        df = _from_table(table)
+    else:
+        df = _read_parquet(name)
+    metrics.DATASET_LOAD_SECONDS.observe(time.perf_counter() - started, name)
+    built = {}
+    for key, build in _on_load.get(name, {}).items():
+        try:
+            built[key] = build(df)
+        except Exception:
+            log.exception("building %s from %s failed", key, name)
+    # published before the snapshot, so a reader of this version finds them
+    for key, obj in built.items():
+        _put_derived(name, key, mtime, obj, df)
+    snap = (mtime, df)
+    # the superseded snapshot, and everything derived from it, is released here
+    _snapshots[name] = snap
+    _drop_derived(name, before=mtime)
+    if table is not None:
+        _put_derived(name, "arrow", mtime, table, None)
+    _absent.pop(name, None)
+    _sizes[name] = int(df.memory_usage(deep=True).sum())
+    _sources[name] = source
+    _last_used[name] = time.monotonic()
+    _enforce_budget(keep=name)
+    return snap
+
+def _snapshot(name: str) -> tuple[float, pd.DataFrame]:
+    snap = _snapshots.get(name)
+    if snap is None and name in _absent:
+        # no stat and no lock: the watcher loads it once a complete file is there
+        raise DatasetUnavailable(f"dataset {name!r} is not loaded: its file is missing or unreadable")
+    if snap is None:
+        # evicted for the budget (or never preloaded): load on demand
+        with metrics.phase("load"), _load_lock:
+            snap = _snapshots.get(name)
+            if snap is None:
+                _misses[name] += 1
+                try:
+                    snap = _load(name)
+                except Exception as exc:
+                    # as after a failed preload: not retried per request, refresh() loads the next file
+                    try:
+                        _absent[name] = _signature(PATHS[name])
+                    except FileNotFoundError:
+                        _absent[name] = None
+                    raise DatasetUnavailable(f"dataset {name!r} could not be loaded: {exc}") from exc
+            else:
+                _hits[name] += 1
+    else:
+        _hits[name] += 1
+    _last_used[name] = time.monotonic()
+    return snap
 
 def _read(name: str) -> pd.DataFrame:
-    return _read_cached(*_key(PATHS[name]))
+    return _snapshot(name)[1]
+
+def version(name: str) -> float:
+    """Snapshot version of a dataset (its mtime); changes when sync copies a new file in."""
+    return _snapshot(name)[0]
+
+def preload() -> None:
+    """
+    Load every dataset in PATHS; called once at startup. A dataset that is missing or
+    fails to load is logged and skipped, so one bad file doesn't keep the API from
+    starting: requests for it get DatasetUnavailable until refresh() loads a new file.
+    """
+    with _load_lock:
+        for name, path in PATHS.items():
+            if name in _snapshots:
+                continue
+            try:
+                sig = _signature(path)
+            except FileNotFoundError:
+                _absent[name] = None
+                continue
+            try:
+                _load(name, sig)
+            except Exception:
+                log.exception("preloading %s failed; it is loaded once the file changes", name)
+                _absent[name] = sig
+
+def refresh() -> list[str]:
+    """
+    Reload datasets whose file changed on disk, and load the ones preload couldn't
+    once their file appears (or is replaced). A new or changed file is only read once
+    its (mtime, size) is unchanged across two polls, so a file that `cp -a` is
+    still writing is never picked up. With shared memory, a snapshot another worker
+    already published is swapped in right away. A snapshot decoded from parquet is
+    swapped for its Feather copy once aggregates.py has written it (same version,
+    off the heap). Returns the names that were swapped in.
+    """
+    swapped = []
+    with _load_lock:
+        for name, path in PATHS.items():
+            try:
+                sig = _signature(path)
+            except FileNotFoundError:
+                continue
+            current = _snapshots.get(name)
+            if current is None and name in _absent:
+                if _absent[name] == sig:
+                    continue  # still the file that failed
+                if _pending.get(name) != sig:
+                    _pending[name] = sig
+                    continue
+                try:
+                    _load(name, sig)
+                except Exception:
+                    log.exception("loading %s failed; waiting for a new file", name)
+                    _absent[name] = sig
+                    _pending.pop(name, None)
+                    continue
+                _pending.pop(name, None)
+                swapped.append(name)
+                continue
+            newer = shm.published(name) if shm.enabled() and current is not None else None
+            if newer is not None and newer[0] > current[0]:
+                try:
+                    _load(name, newer)
+                except Exception:
+                    log.exception("mapping %s published by another worker failed", name)
+                    continue
+                _pending.pop(name, None)
+                swapped.append(name)
+                continue
+            if (current is not None and current[0] == sig[0] and _sources.get(name) == "parquet"
+                    and arrow_store.open_table(path, ARROW_DIR, sig) is not None):
+                _evict(name)  # what was derived from the decoded frame goes with it
+                try:
+                    _load(name, sig)
+                except Exception:
+                    log.exception("mapping the Feather copy of %s failed; it is reloaded on demand", name)
+                continue
+            if current is None or current[0] == sig[0]:
+                # evicted datasets are reloaded on demand, not in the background
+                _pending.pop(name, None)
+                continue
+            if _pending.get(name) != sig:
+                _pending[name] = sig
+                continue
+            try:
+                _load(name, sig)
+            except Exception:
+                log.exception("reloading %s failed; keeping the previous snapshot", name)
+                continue
+            _pending.pop(name, None)
+            swapped.append(name)
+    if swapped:
+        log.info("loaded datasets: %s", ", ".join(swapped))
+    return swapped
+
+async def watch(interval: float = POLL_SECONDS) -> None:
+    """Background task: poll the data dir and swap in new snapshots off the request path."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(refresh)
+        except Exception:
+            log.exception("dataset refresh failed")
+
+def derive(name: str, key: str, build):
+    """
+    Return `build(df)` for the current snapshot of dataset `name`, computed once
+    per version. The object built from a previous version is replaced (and freed).
+    """
+    v, df = _snapshot(name)
+    hit = _derived.get((name, key))
+    if hit is not None and hit[0] == v:
+        return hit[1]
+    obj = build(df)
+    with _load_lock:
+        # a swap that landed meanwhile already released this version: don't keep it
+        current = _snapshots.get(name)
+        if current is not None and current[0] == v:
+            _put_derived(name, key, v, obj, df)
+            _enforce_budget(keep=name)
+    return obj
+
+def on_load(name: str, key: str, build: Callable[[pd.DataFrame], object]) -> None:
+    """
+    Build `build(df)` whenever a snapshot of `name` is loaded (preload, refresh, or on
+    demand), before it is swapped in; readers get it with derived(name, key).
+    """
+    _on_load.setdefault(name, {})[key] = build
+
+def derived(name: str, key: str):
+    """The object on_load built for the current snapshot of `name`; never builds it."""
+    v, _ = _snapshot(name)
+    hit = _derived.get((name, key))
+    # a newer one means a swap landed since the snapshot was read
+    if hit is None or hit[0] < v:
+        raise DatasetUnavailable(f"{key} of dataset {name!r} is not built")
+    return hit[1]
+
+def arrow_table(name: str) -> pa.Table:
+    """The current snapshot as a pyarrow Table, converted once per version; select/slice it freely (zero-copy)."""
+    return derive(name, "arrow", lambda df: pa.Table.from_pandas(df, preserve_index=False))
 
 def get_customers_df():             return _read("customers")
 def get_transactions_df():          return _read("transactions")
@@ -62,5 +458,41 @@ def get_basket_cf_df():    return _read("basket_cf")
 def get_top_same_brand_df():    return _read("top_same_brand")
 def get_hybrid_df():    return _read("hybrid")
 
+def cache_stats() -> dict:
+    """Resident size, version and hit/miss counts per dataset."""
+    return {
+        "max_bytes": MAX_BYTES,
+        "resident_bytes": _resident_bytes(),
+        "datasets": {
+            name: {
+                "resident": name in _snapshots,
+                "version": _snapshots[name][0] if name in _snapshots else None,
+                "bytes": _sizes.get(name, 0),
+                "derived_bytes": sum(b for k, b in _derived_sizes.items() if k[0] == name),
+                "source": _sources.get(name) if name in _snapshots else None,
+                "hits": _hits[name],
+                "misses": _misses[name],
+            }
+            for name in PATHS
+        },
+    }
+
+@metrics.collector
+def _collect():
+    stats = cache_stats()["datasets"]
+    yield from metrics.gauge("api_dataset_bytes", "Resident size of each dataset snapshot.",
+                             (({"dataset": n}, s["bytes"]) for n, s in stats.items()))
+    yield from metrics.gauge("api_dataset_version", "Snapshot version (file mtime) of each resident dataset.",
+                             (({"dataset": n}, s["version"]) for n, s in stats.items() if s["resident"]))
+    yield from metrics.gauge("api_dataset_reads_total", "Dataset reads served from memory (hit) or loaded on demand (miss).",
+                             (({"dataset": n, "result": r}, s[k]) for n, s in stats.items()
+                              for r, k in (("hit", "hits"), ("miss", "misses"))),
+                             kind="counter")
+
 def clear_cache():
-    _read_cached.cache_clear()
\ No newline at end of file
+    _snapshots.clear()
+    _pending.clear()
+    _absent.clear()
+    _derived.clear()
+    _derived_sizes.clear()
+    _sizes.clear()
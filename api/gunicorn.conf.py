@@ -0,0 +1,20 @@
+# gunicorn.conf.py (production serving: one uvicorn worker per core, datasets shared)
+#
+#   gunicorn main:app -c gunicorn.conf.py
+#
+# Every worker maps the same Arrow IPC copy of each snapshot, from data/arrow/ when
+# aggregates.py has written it and from DATA_SHM_DIR otherwise (see shm.py), so adding
+# workers adds CPU, not another copy of the data. Each worker polls
+# the data dir itself; the first to see a new snapshot converts it, the rest follow.
+import os
+
+os.environ.setdefault("DATA_SHM_DIR", "/dev/shm/itcm")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "uvicorn_worker.UvicornWorker"
+# the first boot after a sync converts every dataset before the workers report ready
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+accesslog = None
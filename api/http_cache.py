@@ -0,0 +1,85 @@
+# http_cache.py (ETag / 304 / Cache-Control derived from the dataset versions an endpoint reads)
+import hashlib
+import os
+from typing import Callable, Iterable, Optional
+
+from fastapi import Depends, HTTPException, Request
+
+import deps
+from compression import strip_encoding
+
+CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", "public, max-age=300, stale-while-revalidate=3600")
+# bump (e.g. to the image tag) when a deploy changes payloads without new data
+RELEASE = os.getenv("APP_RELEASE", "")
+
+
+def etag(request: Request, versions: Iterable[tuple[str, float]]) -> str:
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    parts = [
+        RELEASE,
+        request.url.path,
+        query,
+        request.headers.get("accept", ""),
+        *(f"{name}={version!r}" for name, version in versions),
+    ]
+    return '"' + hashlib.sha1("\n".join(parts).encode()).hexdigest() + '"'
+
+
+def _match(if_none_match: str, tag: str) -> Optional[str]:
+    """The If-None-Match entry that matches `tag` (compressed or not), as the client sent it."""
+    for sent in (t.strip() for t in if_none_match.split(",")):
+        if sent == "*":
+            return tag
+        if strip_encoding(sent) in (tag, f"W/{tag}"):
+            return sent
+    return None
+
+
+def versioned(*datasets: str):
+    """
+    Router dependency for GET endpoints backed by `datasets`. Computes the ETag before
+    any pandas work and answers 304 when the client already has it; otherwise the
+    tag is stashed on the request for ConditionalMiddleware to put on the response.
+    """
+    return versioned_by(lambda: [(name, deps.version(name)) for name in datasets])
+
+
+def versioned_by(versions: Callable[[], Iterable[tuple[str, float]]]):
+    """`versioned` for endpoints whose datasets vary: `versions()` lists the (name, version) pairs they read."""
+    def check(request: Request) -> None:
+        if request.method not in ("GET", "HEAD"):
+            return
+        tag = etag(request, versions())
+        inm = request.headers.get("if-none-match")
+        sent = _match(inm, tag) if inm else None
+        if sent is not None:
+            # the 304 carries the validator the 200 did: "<tag>-zstd" etc. when that body was compressed
+            headers = {"ETag": sent, "Cache-Control": CACHE_CONTROL}
+            if strip_encoding(sent) != sent:
+                headers["Vary"] = "Accept-Encoding"
+            raise HTTPException(status_code=304, headers=headers)
+        request.state.etag = tag
+    return Depends(check)
+
+
+class ConditionalMiddleware:
+    """Adds ETag and Cache-Control to successful responses of `versioned` endpoints."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_tag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                tag = scope.get("state", {}).get("etag")
+                if tag is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"etag", tag.encode("latin-1")))
+                    headers.append((b"cache-control", CACHE_CONTROL.encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_tag)
@@ -1,10 +1,20 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 import pandas as pd
 
+import deps
+import metrics
+from compression import CompressionMiddleware
+from http_cache import ConditionalMiddleware
+
 from routers import search as search_router
 from routers import countries as countries_router
 from routers import country_top_cities as country_top_cities_router
+from routers.country_dashboard import router as country_dashboard_router
 from routers.countries_by_revenue import router as country_revenue_router
 from routers.cities_by_revenue import router as cities_by_revenue_router
 from routers.customers_age_gender import router as customers_age_gender_router
@@ -22,7 +32,18 @@ from routers.basket_cf import router as basket_cf_router
 from routers.top_same_brand import router as top_same_brand_router
 from routers.hybrid import router as hybrid_router
 
-app = FastAPI(root_path="/api")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # warm every dataset before serving, then keep them fresh off the request path
+    await asyncio.to_thread(deps.preload)
+    watcher = asyncio.create_task(deps.watch())
+    yield
+    watcher.cancel()
+    await search_router.aclose()
+
+app = FastAPI(root_path="/api", lifespan=lifespan)
+
+app.add_middleware(ConditionalMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,12 +51,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag"],
 )
 
+app.add_middleware(CompressionMiddleware)
+
+# outermost, so latency and bytes are what the client sees
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(search_router.router)
 app.include_router(countries_router.router)
 app.include_router(complements_router)
 app.include_router(country_top_cities_router.router)
+app.include_router(country_dashboard_router)
 app.include_router(country_revenue_router)
 app.include_router(cities_by_revenue_router)
 app.include_router(customers_age_gender_router)
@@ -50,8 +78,20 @@ app.include_router(top_repurchase_by_country_router)
 app.include_router(semantic_similarity_recs_router)
 app.include_router(basket_cf_router)
 app.include_router(top_same_brand_router)
-#app.include_router(hybrid_router)
+app.include_router(hybrid_router)
+
+@app.exception_handler(deps.DatasetUnavailable)
+def dataset_unavailable(request, exc: deps.DatasetUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 @app.get("/health")
 def health():
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True}
+
+@app.get("/health/datasets")
+def health_datasets():
+    return deps.cache_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
@@ -0,0 +1,78 @@
+# materialize.py (serve aggregate payloads as prebuilt JSON bytes, rebuilt per dataset version)
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from typing import Callable
+
+import pandas as pd
+from fastapi import Response
+
+import aggregates
+import deps
+import metrics
+from responses import dumps
+
+# endpoint id -> (undecorated function, datasets); aggregates.py builds from this
+REGISTRY: dict[str, tuple[Callable, tuple[str, ...]]] = {}
+
+
+def query_key(kwargs: dict) -> tuple:
+    return tuple(
+        (k, v) for k, v in sorted(kwargs.items())
+        if not isinstance(v, pd.DataFrame)
+    )
+
+
+def materialized(*datasets: str, maxsize: int = 32) -> Callable:
+    """
+    Cache an endpoint's JSON body per (dataset versions, query params).
+
+    The wrapped function runs once per snapshot and parameter set; afterwards the
+    serialized bytes are returned as-is. When any of `datasets` gets a new
+    version, every variant built from the old one is dropped. At most `maxsize`
+    parameter variants are kept (least recently used evicted first).
+    DataFrame arguments (from `Depends(get_*_df)`) are not part of the key.
+    On a miss, a body prebuilt by aggregates.py for the same versions is used
+    before falling back to computing it in-process.
+    """
+    def decorate(fn: Callable) -> Callable:
+        endpoint = f"{fn.__module__}:{fn.__name__}"
+        REGISTRY[endpoint] = (fn, datasets)
+        bodies: "OrderedDict[tuple, bytes]" = OrderedDict()
+        state = {"versions": None}
+        lock = Lock()
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            versions = tuple(deps.version(name) for name in datasets)
+            key = query_key(kwargs)
+            with lock:
+                if state["versions"] != versions:
+                    bodies.clear()
+                    state["versions"] = versions
+                body = bodies.get(key)
+                if body is not None:
+                    bodies.move_to_end(key)
+
+            if body is not None:
+                metrics.MATERIALIZED.inc(endpoint, "memory")
+            else:
+                body = aggregates.lookup(endpoint, key, dict(zip(datasets, versions)))
+                if body is not None:
+                    metrics.MATERIALIZED.inc(endpoint, "prebuilt")
+                else:
+                    metrics.MATERIALIZED.inc(endpoint, "computed")
+                    result = fn(*args, **kwargs)
+                    with metrics.phase("serialize"):
+                        body = dumps(result)
+                with lock:
+                    if state["versions"] == versions:
+                        bodies[key] = body
+                        while len(bodies) > maxsize:
+                            bodies.popitem(last=False)
+
+            return Response(content=body, media_type="application/json")
+
+        wrapper.cache_clear = bodies.clear
+        return wrapper
+    return decorate
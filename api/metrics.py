@@ -0,0 +1,244 @@
+# metrics.py (per-route latency / size histograms, request phase timings and cache
+# counters, rendered in the Prometheus text format)
+import contextvars
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Iterable, Iterator, Optional
+
+# add a Server-Timing header (load / compute / serialize / compress) to every response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = tuple(float(4 ** i * 256) for i in range(10))  # 256 B .. 64 MiB
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(value: float) -> str:
+    return repr(float(value))
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = Lock()
+
+    def inc(self, *labelvalues, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, total in items:
+            yield f"{self.name}{_labels(self.labels, values)} {_num(total)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        # labelvalues -> [count per bucket (+Inf last), sum]
+        self._series: dict[tuple, list] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *labelvalues) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._series.items())
+        for values, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_num(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, values)} {_num(total)}"
+            yield f"{self.name}_count{_labels(self.labels, values)} {cumulative}"
+
+
+def gauge(name: str, help: str, samples: Iterable[tuple[dict, float]], kind: str = "gauge") -> Iterator[str]:
+    """Render (labels, value) pairs computed at scrape time; `kind` is "counter" for running totals."""
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {kind}"
+    for labels, value in samples:
+        yield f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_num(value)}"
+
+
+REQUEST_SECONDS = Histogram(
+    "api_request_duration_seconds", "Request latency, first byte in to last byte out.",
+    ("method", "route", "status"),
+)
+PHASE_SECONDS = Histogram(
+    "api_request_phase_seconds", "Time per request spent loading data, computing, serializing and compressing.",
+    ("route", "phase"),
+)
+RESPONSE_BYTES = Histogram(
+    "api_response_bytes", "Response body size as sent (after compression).", ("route",), BYTES_BUCKETS,
+)
+DATASET_LOAD_SECONDS = Histogram(
+    "api_dataset_load_seconds", "Time to read and dtype-optimize one dataset snapshot.", ("dataset",),
+)
+MATERIALIZED = Counter(
+    "api_materialized_total", "Materialized endpoint bodies by where they came from (memory, prebuilt, computed).",
+    ("endpoint", "source"),
+)
+
+# scrape-time gauges registered by the modules that own the state (deps, compression)
+_collectors: list[Callable[[], Iterable[str]]] = []
+
+
+def collector(fn: Callable[[], Iterable[str]]) -> Callable[[], Iterable[str]]:
+    _collectors.append(fn)
+    return fn
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in (REQUEST_SECONDS, PHASE_SECONDS, RESPONSE_BYTES, DATASET_LOAD_SECONDS, MATERIALIZED):
+        lines.extend(metric.render())
+    for fn in _collectors:
+        lines.extend(fn())
+    return "\n".join(lines) + "\n"
+
+
+class _Phases:
+    """Exclusive time per phase for one request; a nested phase pauses the enclosing one."""
+
+    def __init__(self):
+        self.totals: dict[str, float] = {}
+        self._stack: list[str] = []
+        self._mark = 0.0
+        self._lock = Lock()
+
+    def enter(self, name: str) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            if self._stack:
+                top = self._stack[-1]
+                self.totals[top] = self.totals.get(top, 0.0) + now - self._mark
+            self._stack.append(name)
+            self._mark = now
+
+    def exit(self) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            top = self._stack.pop()
+            self.totals[top] = self.totals.get(top, 0.0) + now - self._mark
+            self._mark = now
+
+    def merge(self, other: "_Phases") -> None:
+        with self._lock:
+            for name, secs in other.totals.items():
+                self.totals[name] = self.totals.get(name, 0.0) + secs
+
+
+_current: contextvars.ContextVar[Optional[_Phases]] = contextvars.ContextVar("phases", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Attribute the enclosed time to `name` for the request being served (no-op outside one)."""
+    phases = _current.get()
+    if phases is None:
+        yield
+        return
+    phases.enter(name)
+    try:
+        yield
+    finally:
+        phases.exit()
+
+
+def section(fn: Callable, *args):
+    """
+    `fn(*args)` timed on phases of its own, added to the request's when it returns. For
+    parts of a request fanned out to threads, which would otherwise interleave their
+    enter / exit on the request's phase stack; overlapping sections each add their time.
+    """
+    request = _current.get()
+    if request is None:
+        return fn(*args)
+    own = _Phases()
+    token = _current.set(own)
+    try:
+        return fn(*args)
+    finally:
+        _current.reset(token)
+        request.merge(own)
+
+
+def _server_timing(phases: dict[str, float], total: float) -> bytes:
+    # as of the response head; serializing a streamed body happens after it is sent
+    parts = [f"{name};dur={secs * 1000:.2f}" for name, secs in phases.items()]
+    parts.append(f"compute;dur={max(total - sum(phases.values()), 0.0) * 1000:.2f}")
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    Records latency, response bytes and phase timings per route template (e.g.
+    "/country/{country}/top-cities"), so path parameters don't explode the label set.
+    Whatever time isn't attributed to load / serialize / compress is counted as compute.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        phases = _Phases()
+        token = _current.set(phases)
+        start = time.perf_counter()
+        state = {"status": 500, "bytes": 0}
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                if SERVER_TIMING:
+                    timing = _server_timing(phases.totals, time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing)]}
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(elapsed, scope["method"], route, str(state["status"]))
+            RESPONSE_BYTES.observe(state["bytes"], route)
+            attributed = 0.0
+            for name, secs in phases.totals.items():
+                PHASE_SECONDS.observe(secs, route, name)
+                attributed += secs
+            PHASE_SECONDS.observe(max(elapsed - attributed, 0.0), route, "compute")
@@ -0,0 +1,45 @@
+# partitions.py (per-country / per-season slices of a dataset, built once per snapshot
+# so filtered endpoints are a dict lookup instead of a scan of the whole frame)
+from typing import Callable, Hashable, Sequence
+
+import pandas as pd
+
+import deps
+
+
+def normalize(value: str) -> str:
+    """Lookup form of a country / season label: surrounding whitespace and case ignored."""
+    return value.strip().casefold()
+
+
+def _normalized(s: pd.Series) -> pd.Series:
+    return s.astype("string").str.strip().str.casefold()
+
+
+class Partitions:
+    """
+    Slices of a frame keyed by the normalized values of `by` (a tuple when `by` has
+    several columns), each passed through `prepare` (projection, sort, rename) once.
+    Rows whose key is null belong to no slice. Unknown keys get `prepare` of no rows.
+    """
+
+    def __init__(self, df: pd.DataFrame, by: Sequence[str], prepare: Callable[[pd.DataFrame], object]):
+        keys = [_normalized(df[c]) for c in by]
+        groups = df.groupby(keys[0] if len(keys) == 1 else keys, sort=False, dropna=True).indices
+        # slices keep the original row order, so `prepare` sees exactly what a mask would select
+        self.slices = {k: prepare(df.iloc[offsets]) for k, offsets in groups.items()}
+        self.empty = prepare(df.iloc[:0])
+
+    def get(self, *values: str):
+        key: Hashable = normalize(values[0]) if len(values) == 1 else tuple(normalize(v) for v in values)
+        return self.slices.get(key, self.empty)
+
+
+def partitioned(name: str, key: str, by: Sequence[str], prepare: Callable[[pd.DataFrame], object]) -> Partitions:
+    """Partitions of dataset `name` for the current snapshot; `key` names this (by, prepare) combination."""
+    return deps.derive(name, f"partitions:{key}", lambda df: Partitions(df, by, prepare))
+
+
+def prepared(name: str, key: str, prepare: Callable[[pd.DataFrame], object]):
+    """`prepare` of the whole dataset, once per snapshot (the unfiltered variant of an endpoint)."""
+    return deps.derive(name, f"prepared:{key}", prepare)
@@ -0,0 +1,115 @@
+# recs.py (indexed point lookups and paged / streamed bulk reads of the
+# "Product ID" / "Top N" recommendation tables)
+import base64
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel, Field
+
+import deps
+from responses import tabular_response
+
+KEY = "Product ID"
+
+
+class LookupIn(BaseModel):
+    product_ids: List[str] = Field(..., max_length=1000)
+
+
+def key_strings(s: pd.Series) -> pd.Series:
+    # 123.0 and 123 must both be addressable as "123"
+    if pd.api.types.is_float_dtype(s) and s.dropna().mod(1).eq(0).all():
+        s = s.astype("Int64")
+    return s.astype("string").fillna("")
+
+
+class RecIndex:
+    """Product id -> row offsets, over the table's columns held as numpy arrays."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.columns = list(df.columns)
+        self.arrays = {c: df[c].to_numpy() for c in self.columns}
+        # NaN / NA / None cells, so rows() can return them as null
+        self.nulls = {c: df[c].isna().to_numpy() for c in self.columns}
+        keys = key_strings(df[KEY])
+        self.offsets: Dict[str, np.ndarray] = keys.groupby(keys, sort=False).indices
+
+    def rows(self, product_id: str, columns: List[str]) -> List[dict]:
+        offsets = self.offsets.get(product_id.strip())
+        if offsets is None:
+            return []
+        values = []
+        for c in columns:
+            column, nulls = self.arrays[c][offsets].tolist(), self.nulls[c][offsets]
+            if nulls.any():
+                column = [None if na else v for v, na in zip(column, nulls.tolist())]
+            values.append(column)
+        return [dict(zip(columns, r)) for r in zip(*values)]
+
+
+def get_index(name: str) -> RecIndex:
+    return deps.derive(name, "rec_index", RecIndex)
+
+
+def lookup(name: str, product_ids: List[str], columns: List[str]) -> dict:
+    index = get_index(name)
+    data, missing = [], []
+    for pid in product_ids:
+        rows = index.rows(pid, columns)
+        if rows:
+            data.extend(rows)
+        else:
+            missing.append(pid)
+    return {"data": data, "missing": missing}
+
+
+def page(df: pd.DataFrame, offset: int = 0, limit: Optional[int] = None) -> pd.DataFrame:
+    stop = None if limit is None else offset + limit
+    return df.iloc[offset:stop]
+
+
+# cursors pin the snapshot they were issued for, so a page never mixes two versions
+def encode_cursor(name: str, offset: int) -> str:
+    raw = f"{deps.version(name)!r}:{offset}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(name: str, cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        version, offset = raw.rsplit(":", 1)
+        version, offset = float(version), int(offset)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed cursor")
+    if version != deps.version(name):
+        raise HTTPException(status_code=410, detail="Data was refreshed; restart paging without a cursor")
+    return offset
+
+
+def rows_response(
+    request: Request,
+    name: str,
+    df: pd.DataFrame,
+    columns: List[str],
+    offset: int = 0,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Response:
+    """
+    Bulk read of a recommendation table: `columns` of rows [offset, offset+limit), or
+    from `cursor` when given. When rows remain, the next page's cursor is returned in
+    X-Next-Cursor. The body is negotiated by responses.tabular_response (JSON array
+    streamed in chunks, NDJSON, Arrow IPC or Parquet).
+    """
+    if cursor is not None:
+        offset = decode_cursor(name, cursor)
+    headers = {"X-Total-Count": str(len(df))}
+    if limit is not None and offset + limit < len(df):
+        headers["X-Next-Cursor"] = encode_cursor(name, offset + limit)
+    return tabular_response(
+        request, page(df[columns], offset, limit),
+        table=lambda: deps.arrow_table(name).select(columns).slice(offset, limit),
+        headers=headers,
+    )
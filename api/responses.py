@@ -0,0 +1,233 @@
+# responses.py (JSON bytes straight from DataFrames, skipping to_dict + jsonable_encoder;
+# Arrow IPC / Parquet for clients that ask for them)
+import io
+import json
+from typing import Any, Callable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+import metrics
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+NDJSON = "application/x-ndjson"
+BATCH_ROWS = 64 * 1024   # rows per Arrow record batch
+STREAM_ROWS = 10_000     # rows encoded per chunk when streaming JSON / NDJSON
+
+
+def _default(o: Any):
+    if isinstance(o, np.integer):
+        return int(o)
+    if isinstance(o, np.floating):
+        return None if np.isnan(o) else float(o)
+    if isinstance(o, np.bool_):
+        return bool(o)
+    if o is pd.NA or o is pd.NaT:
+        return None
+    if isinstance(o, (pd.Period, pd.Timestamp)):
+        return str(o)
+    raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+
+def _scalar(o: Any) -> bytes:
+    # same settings as starlette's JSONResponse
+    return json.dumps(
+        o, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+def _isoformat(s: pd.Series) -> list:
+    # what jsonable_encoder produced for Timestamps: "2024-01-01T00:00:00"
+    return [None if pd.isna(v) else v.isoformat() for v in s.tolist()]
+
+
+def _temporal(dtype) -> bool:
+    return pd.api.types.is_datetime64_any_dtype(dtype) or isinstance(dtype, pd.PeriodDtype)
+
+
+def _with_iso_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    `df` with datetime columns as isoformat strings and Period columns as their labels
+    ("2024-01"), i.e. what _column makes of them, for the to_json paths (which can't
+    encode Periods at all).
+    """
+    dates = [i for i, t in enumerate(df.dtypes) if _temporal(t)]
+    if not dates:
+        return df
+    df = df.copy()
+    for i in dates:
+        df.isetitem(i, pd.Series(_column(df.iloc[:, i]), index=df.index, dtype=object))
+    return df
+
+
+def _column(s: pd.Series) -> list:
+    """Column as native Python values, with NaN / NA / NaT as None."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return _isoformat(s)
+    if isinstance(s.dtype, pd.PeriodDtype):
+        values = s.astype(str).tolist()
+    else:
+        values = s.tolist()
+    if s.hasnans:
+        values = [None if na else v for v, na in zip(values, s.isna().tolist())]
+    return values
+
+
+def _has_floats(df: pd.DataFrame) -> bool:
+    # pandas' C encoder is exact for everything but floats (capped at 15 digits)
+    return any(pd.api.types.is_float_dtype(t) for t in df.dtypes)
+
+
+def _row_dicts(df: pd.DataFrame) -> Iterator[dict]:
+    columns = [str(c) for c in df.columns]
+    values = [_column(df.iloc[:, i]) for i in range(df.shape[1])]
+    return (dict(zip(columns, row)) for row in zip(*values))
+
+
+def records(df: pd.DataFrame) -> bytes:
+    """`df` as a JSON array of row objects, encoded column by column."""
+    if not _has_floats(df):
+        return _with_iso_dates(df).to_json(orient="records", force_ascii=False).encode("utf-8")
+    return _scalar(list(_row_dicts(df)))
+
+
+def ndjson(df: pd.DataFrame) -> bytes:
+    """`df` as newline-delimited JSON, one row object per line."""
+    if df.empty:
+        return b""
+    if not _has_floats(df):
+        return _with_iso_dates(df).to_json(orient="records", lines=True, force_ascii=False).encode("utf-8")
+    return b"".join(_scalar(row) + b"\n" for row in _row_dicts(df))
+
+
+def _plain(obj: Any) -> bool:
+    """True when nothing inside `obj` needs splicing, so one json.dumps call encodes it."""
+    if isinstance(obj, dict):
+        return all(isinstance(k, str) and _plain(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return all(_plain(v) for v in obj)
+    return not isinstance(obj, (pd.DataFrame, Response))
+
+
+def dumps(obj: Any) -> bytes:
+    """JSON-encode `obj`; DataFrames anywhere inside it are spliced in as records."""
+    if isinstance(obj, (dict, list, tuple)) and _plain(obj):
+        return _scalar(obj)
+    if isinstance(obj, pd.DataFrame):
+        return records(obj)
+    if isinstance(obj, Response):
+        return bytes(obj.body)
+    if isinstance(obj, dict):
+        return b"{" + b",".join(_scalar(str(k)) + b":" + dumps(v) for k, v in obj.items()) + b"}"
+    if isinstance(obj, (list, tuple)):
+        return b"[" + b",".join(dumps(v) for v in obj) + b"]"
+    return _scalar(obj)
+
+
+def json_response(payload: Any, **kwargs) -> Response:
+    with metrics.phase("serialize"):
+        body = dumps(payload)
+    return Response(content=body, media_type="application/json", **kwargs)
+
+
+def _chunks(df: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(df), STREAM_ROWS):
+        yield df.iloc[start:start + STREAM_ROWS]
+
+
+def _json_array_stream(df: pd.DataFrame) -> Iterator[bytes]:
+    yield b"["
+    sep = b""
+    for chunk in _chunks(df):
+        with metrics.phase("serialize"):
+            body = records(chunk)[1:-1]
+        yield sep + body
+        sep = b","
+    yield b"]"
+
+
+def stream_records(df: pd.DataFrame, **kwargs) -> Response:
+    """JSON array of `df`'s rows, encoded and sent STREAM_ROWS at a time."""
+    if len(df) <= STREAM_ROWS:
+        return json_response(df, **kwargs)
+    return StreamingResponse(_json_array_stream(df), media_type="application/json", **kwargs)
+
+
+def _ndjson_stream(df: pd.DataFrame) -> Iterator[bytes]:
+    for chunk in _chunks(df):
+        with metrics.phase("serialize"):
+            body = ndjson(chunk)
+        yield body
+
+
+def stream_ndjson(df: pd.DataFrame, **kwargs) -> Response:
+    return StreamingResponse(_ndjson_stream(df), media_type=NDJSON, **kwargs)
+
+
+class _Chunks:
+    """Write-only file object for pyarrow writers; the caller drains `chunks`."""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self.chunks)
+        self.chunks.clear()
+        return out
+
+
+def _arrow_stream(table: pa.Table) -> Iterator[bytes]:
+    sink = _Chunks()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        yield sink.drain()  # schema (and nothing else) first
+        for batch in table.to_batches(max_chunksize=BATCH_ROWS):
+            with metrics.phase("serialize"):
+                writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def tabular_response(
+    request: Request,
+    df: Optional[pd.DataFrame] = None,
+    payload: Any = None,
+    table: Optional[Callable[[], pa.Table]] = None,
+    headers: Optional[dict] = None,
+) -> Response:
+    """
+    Negotiate on Accept: Arrow IPC stream or Parquet for the rows themselves (`table()`,
+    or `df` converted), NDJSON streamed in chunks, otherwise JSON of `payload`. Without
+    a payload the rows are sent as a JSON array, streamed in chunks when large.
+    """
+    accept = request.headers.get("accept", "")
+    headers = {"Vary": "Accept", **(headers or {})}
+    if ARROW_STREAM in accept or PARQUET in accept:
+        tbl = table() if table is not None else pa.Table.from_pandas(df, preserve_index=False)
+        if ARROW_STREAM in accept:
+            return StreamingResponse(_arrow_stream(tbl), media_type=ARROW_STREAM, headers=headers)
+        buf = io.BytesIO()
+        with metrics.phase("serialize"):
+            pq.write_table(tbl, buf)
+        return Response(content=buf.getvalue(), media_type=PARQUET, headers=headers)
+    if NDJSON in accept:
+        return stream_ndjson(df, headers=headers)
+    if payload is None:
+        return stream_records(df, headers=headers)
+    return json_response(payload, headers=headers)
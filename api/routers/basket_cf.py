@@ -1,13 +1,52 @@
-from fastapi import APIRouter
-from deps import get_basket_cf_df
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+from cooccurrence import get_engine
+from deps import get_basket_cf_df, require
+from http_cache import versioned
+from recs import LookupIn, get_index, lookup, rows_response
 
-router = APIRouter(prefix="/basket_cf", tags=["basket_cf"])
+router = APIRouter(prefix="/basket_cf", tags=["basket_cf"], dependencies=[versioned("basket_cf")])
+require("order_items", "order_id", "product_id")
 
-@router.get("")
-def get_all_rows():
-    df = get_basket_cf_df()
+class ScoreIn(BaseModel):
+    product_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    k: int = Field(10, ge=1, le=1000)
+
+def _columns(columns) -> list[str]:
     # keep only Product ID and Top N columns, ordered Top 1..Top 10
-    top_cols = [c for c in df.columns if c.startswith("Top ")]
+    top_cols = [c for c in columns if c.startswith("Top ")]
     top_cols = sorted(top_cols, key=lambda c: int(c.split()[1]))
-    keep_cols = ["Product ID"] + top_cols
-    return df[keep_cols].to_dict(orient="records")
+    return ["Product ID"] + top_cols
+
+@router.get("")
+def get_all_rows(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+):
+    df = get_basket_cf_df()
+    return rows_response(request, "basket_cf", df, _columns(df.columns), offset, limit, cursor)
+
+@router.post("/lookup")
+def lookup_rows(body: LookupIn):
+    cols = _columns(get_index("basket_cf").columns)
+    return lookup("basket_cf", body.product_ids, cols)
+
+@router.post("/score")
+def score_basket(body: ScoreIn):
+    """
+    Live suggestions for a whole basket from the co-occurrence counts over the current
+    order_items snapshot (see cooccurrence.py), rather than the nightly basket_cf table.
+    """
+    data, missing = get_engine().score(body.product_ids, body.k)
+    return {"data": data, "missing": missing}
+
+@router.get("/{product_id}")
+def get_row(product_id: str):
+    index = get_index("basket_cf")
+    rows = index.rows(product_id, _columns(index.columns))
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"Unknown product id: {product_id}")
+    return rows[0]
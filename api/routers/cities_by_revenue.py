@@ -1,12 +1,20 @@
 from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
-from fastapi import APIRouter, Depends
+import pyarrow as pa
+import pyarrow.compute as pc
+from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 
-from deps import get_city_summary_df
+from deps import get_city_summary_df, require
+from http_cache import versioned
+from materialize import materialized
+from partitions import normalize
+from topk import TopK
 
-router = APIRouter(prefix="/cities_by_revenue", tags=["cities"])
+router = APIRouter(prefix="/cities_by_revenue", tags=["cities"], dependencies=[versioned("city_summary")])
+require("city_summary", "country", "city", "total_revenue_sek", "total_orders")
 
 class CityOut(BaseModel):
     city: str
@@ -16,39 +24,58 @@ class CityOut(BaseModel):
 class Resp(BaseModel):
     top_cities_by_revenue_ksek: Dict[str, List[CityOut]]
 
+def _known(city: pd.Series) -> np.ndarray:
+    """Mask of rows whose city doesn't mention "unknown"; categoricals test each category once."""
+    def unknown(values) -> np.ndarray:
+        hits = pc.match_substring(pa.array(values, type=pa.string(), from_pandas=True), "unknown", ignore_case=True)
+        return hits.fill_null(False).to_numpy(zero_copy_only=False)
+
+    if isinstance(city.dtype, pd.CategoricalDtype):
+        per_category = unknown(city.cat.categories.astype(str))
+        return ~np.append(per_category, False)[city.cat.codes.to_numpy()]  # code -1 (NaN) is kept
+    return ~unknown(city.astype(object))
+
+def _sum_by_city(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    groupby(["country", "city"]).sum() of revenue and orders, as one np.unique over
+    (country, city) code pairs: same rows, same (sorted) order, nulls skipped.
+    """
+    country, countries = pd.factorize(df["country"], sort=True)
+    city, cities = pd.factorize(df["city"], sort=True)
+    ok = (country >= 0) & (city >= 0)
+    pairs, inverse = np.unique(country[ok].astype(np.int64) * len(cities) + city[ok], return_inverse=True)
+
+    def total(col: str) -> np.ndarray:
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)[ok]
+        return np.bincount(inverse, weights=np.nan_to_num(values), minlength=len(pairs))
+
+    return pd.DataFrame({
+        "country": countries.take(pairs // len(cities)),
+        "city": cities.take(pairs % len(cities)),
+        "total_revenue_sek": total("total_revenue_sek"),
+        "total_orders": total("total_orders"),
+    })
+
 @router.get("", response_model=Resp)
-def cities_by_revenue(df: pd.DataFrame = Depends(get_city_summary_df)):
-    df = df.loc[
-        ~df["city"].str.contains("unknown", case=False, na=False),
-        ["country", "city", "total_revenue_sek", "total_orders"],
-    ]
-    agg = (
-        df.groupby(["country", "city"], as_index=False)
-          .sum(numeric_only=True)
-    )
+@materialized("city_summary")
+def cities_by_revenue(
+    df: pd.DataFrame = Depends(get_city_summary_df),
+    k: int = Query(10, ge=1, description="cities per country"),
+    country: Optional[str] = Query(None, description="only this country (case-insensitive)"),
+):
+    agg = _sum_by_city(df.loc[_known(df["city"]), ["country", "city", "total_revenue_sek", "total_orders"]])
 
     agg["ksek"] = (agg["total_revenue_sek"] / 1000).round().astype("int64")
 
-    agg["avg_order_value_sek"] = (
-        agg["total_revenue_sek"]
-        .div(agg["total_orders"].replace(0, pd.NA))
-        .round()
-        .astype("Int64")
-    )
-
-    top10 = (
-        agg.groupby("country", group_keys=False)
-           .apply(lambda g: g.nlargest(10, "ksek"))
-           .reset_index(drop=True)
-    )
-    result: Dict[str, List[dict]] = {}
-    for country, g in top10.groupby("country"):
-        out = g[["city", "ksek", "avg_order_value_sek"]].copy()
-        out["avg_order_value_sek"] = (
-            out["avg_order_value_sek"]
-            .astype("object")
-            .where(out["avg_order_value_sek"].notna(), None)
-        )
-        result[country] = out.to_dict(orient="records")
+    orders = agg["total_orders"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg = np.round(agg["total_revenue_sek"].to_numpy() / orders)
+    missing = (orders == 0) | np.isnan(avg)
+    agg["avg_order_value_sek"] = pd.arrays.IntegerArray(np.where(missing, 0, avg).astype(np.int64), missing)
 
+    top = TopK(agg, "country", "ksek")
+    result: Dict[str, pd.DataFrame] = {
+        str(c): g for c, g in top.groups(k, ["city", "ksek", "avg_order_value_sek"]).items()
+        if country is None or normalize(str(c)) == normalize(country)
+    }
     return {"top_cities_by_revenue_ksek": result}
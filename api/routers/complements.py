@@ -1,11 +1,37 @@
-from fastapi import APIRouter
+import re
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
 from deps import get_complements_df
+from http_cache import versioned
+from recs import LookupIn, get_index, lookup, rows_response
 
-router = APIRouter(prefix="/complements", tags=["complements"])
+router = APIRouter(prefix="/complements", tags=["complements"], dependencies=[versioned("complements")])
+
+def _columns(columns, include_scores: bool) -> list[str]:
+    if include_scores:
+        return list(columns)
+    return [c for c in columns if not re.match(r'(?i)^score\b', c)]
 
 @router.get("")
-def get_all_rows(include_scores: bool = False):
+def get_all_rows(
+    request: Request,
+    include_scores: bool = False,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+):
     df = get_complements_df()
-    if not include_scores:
-        df = df.loc[:, ~df.columns.str.contains(r'(?i)^score\b')]
-    return df.to_dict(orient="records")
+    return rows_response(request, "complements", df, _columns(df.columns, include_scores), offset, limit, cursor)
+
+@router.post("/lookup")
+def lookup_rows(body: LookupIn, include_scores: bool = False):
+    cols = _columns(get_index("complements").columns, include_scores)
+    return lookup("complements", body.product_ids, cols)
+
+@router.get("/{product_id}")
+def get_row(product_id: str, include_scores: bool = False):
+    index = get_index("complements")
+    rows = index.rows(product_id, _columns(index.columns, include_scores))
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"Unknown product id: {product_id}")
+    return rows[0]
@@ -1,14 +1,18 @@
 # routers/countries.py
 from fastapi import APIRouter, Depends
 import pandas as pd
-from deps import get_customer_summary_df
+from deps import get_customer_summary_df, require
+from http_cache import versioned
+from materialize import materialized
 
-router = APIRouter(prefix="/countries", tags=["countries"])
+router = APIRouter(prefix="/countries", tags=["countries"], dependencies=[versioned("customer_summary")])
+require("customer_summary", "country", "customer_id", "status")
 
 @router.get("")
+@materialized("customer_summary")
 def customers_by_country(df: pd.DataFrame = Depends(get_customer_summary_df)):
     counts = (
-        df.groupby("country")["customer_id"]
+        df.groupby("country", observed=True)["customer_id"]
           .nunique()                # or .count() if duplicates are OK
           .sort_values(ascending=False)
           .astype(int)
@@ -17,11 +21,12 @@ def customers_by_country(df: pd.DataFrame = Depends(get_customer_summary_df)):
     return {"customers_by_country": counts}
 
 @router.get("/segments")
+@materialized("customer_summary")
 def customer_segments_by_country(df: pd.DataFrame = Depends(get_customer_summary_df)):
     labels = ["New", "Returning", "Loyal"]
 
     counts = (
-        df.groupby(["country", "status"])
+        df.groupby(["country", "status"], observed=True)
           .size()
           .rename("count")
           .reset_index()
@@ -1,9 +1,13 @@
 # routers/countries_by_channel.py
 from fastapi import APIRouter, Depends
 import pandas as pd
-from deps import get_countries_by_channel_df
+from deps import get_countries_by_channel_df, require
+from http_cache import versioned
+from partitions import partitioned
+from responses import json_response
 
-router = APIRouter(prefix="/countries_by_channel", tags=["countries"])
+router = APIRouter(prefix="/countries_by_channel", tags=["countries"], dependencies=[versioned("countries_by_channel")])
+require("countries_by_channel", "country", "channel", "customers_count")
 
 @router.get("")
 def countries_by_channel(df: pd.DataFrame = Depends(get_countries_by_channel_df)):
@@ -13,7 +17,16 @@ def countries_by_channel(df: pd.DataFrame = Depends(get_countries_by_channel_df)
     d["customers_count"] = pd.to_numeric(d["customers_count"], errors="coerce").fillna(0).astype("int64")
 
     result = {
-        country: grp[["channel", "customers_count"]].to_dict(orient="records")
+        country: grp[["channel", "customers_count"]]
         for country, grp in d.groupby("country", sort=False)
     }
-    return {"countries_by_channel": result}
+    return json_response({"countries_by_channel": result})
+
+def _channels(df: pd.DataFrame) -> pd.DataFrame:
+    d = df.loc[:, ["channel", "customers_count"]].copy()
+    d["channel"] = d["channel"].astype(str)
+    d["customers_count"] = pd.to_numeric(d["customers_count"], errors="coerce").fillna(0).astype("int64")
+    return d.reset_index(drop=True)
+
+def for_country(country: str) -> pd.DataFrame:
+    return partitioned("countries_by_channel", "channels", ["country"], _channels).get(country)
@@ -1,9 +1,13 @@
 # routers/countries_by_channel_by_month.py
 from fastapi import APIRouter, Depends
 import pandas as pd
-from deps import get_countries_by_channel_by_month_df
+from deps import get_countries_by_channel_by_month_df, require
+from http_cache import versioned
+from partitions import partitioned
+from responses import json_response
 
-router = APIRouter(prefix="/countries_by_channel_by_month", tags=["countries"])
+router = APIRouter(prefix="/countries_by_channel_by_month", tags=["countries"], dependencies=[versioned("countries_by_channel_by_month")])
+require("countries_by_channel_by_month", "country", "channel", "year_month", "customers_count")
 
 @router.get("")
 def countries_by_channel_by_month(
@@ -17,9 +21,23 @@ def countries_by_channel_by_month(
 
     d = d.sort_values(["country", "channel", "year_month"], kind="stable")
 
-    result: dict[str, dict[str, list[dict]]] = {}
+    result: dict[str, dict[str, pd.DataFrame]] = {}
     for (country, channel), grp in d.groupby(["country", "channel"], sort=False):
         result.setdefault(country, {})
-        result[country][channel] = grp.loc[:, ["year_month", "customers_count"]].to_dict(orient="records")
+        result[country][channel] = grp.loc[:, ["year_month", "customers_count"]]
 
-    return {"countries_by_channel_by_month": result}
+    return json_response({"countries_by_channel_by_month": result})
+
+def _channels_by_month(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    d = df.loc[:, ["channel", "year_month", "customers_count"]].copy()
+    d["channel"] = d["channel"].astype(str)
+    d["year_month"] = d["year_month"].astype(str)
+    d["customers_count"] = pd.to_numeric(d["customers_count"], errors="coerce").fillna(0).astype("int64")
+    d = d.sort_values(["channel", "year_month"], kind="stable")
+    return {
+        channel: grp.loc[:, ["year_month", "customers_count"]]
+        for channel, grp in d.groupby("channel", sort=False)
+    }
+
+def for_country(country: str) -> dict[str, pd.DataFrame]:
+    return partitioned("countries_by_channel_by_month", "by_month", ["country"], _channels_by_month).get(country)
@@ -1,9 +1,12 @@
 # routers/countries_by_revenue.py
 from fastapi import APIRouter, Depends
 import pandas as pd
-from deps import get_country_summary_df
+from deps import get_country_summary_df, require
+from http_cache import versioned
+from responses import json_response
 
-router = APIRouter(prefix="/countries_by_revenue", tags=["countries"])
+router = APIRouter(prefix="/countries_by_revenue", tags=["countries"], dependencies=[versioned("country_summary")])
+require("country_summary", "country", "total_revenue_sek", "total_orders", "avg_order_value_sek")
 
 def _build_payload(df: pd.DataFrame):
     d = df.loc[:, ["country", "total_revenue_sek", "total_orders", "avg_order_value_sek"]].copy()
@@ -18,4 +21,4 @@ def _build_payload(df: pd.DataFrame):
 
 @router.get("")
 def revenue_by_country(df: pd.DataFrame = Depends(get_country_summary_df)):
-    return _build_payload(df)
+    return json_response(_build_payload(df))
@@ -0,0 +1,77 @@
+# routers/country_dashboard.py (every section of a country page in one request)
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+import metrics
+from http_cache import versioned
+from materialize import materialized
+from routers import (
+    countries_by_channel,
+    countries_by_channel_by_month,
+    country_top_cities,
+    customers_age_gender,
+    sales_month,
+    top_brands_by_country,
+    top_categories_by_season,
+    top_products,
+    top_repurchase_by_country,
+)
+
+DATASETS = (
+    "city_summary", "city_monthly_revenue", "customer_summary", "countries_by_channel",
+    "countries_by_channel_by_month", "top_brands", "top_categories", "top_groups", "top_repurchase",
+)
+
+router = APIRouter(prefix="/country", tags=["country"], dependencies=[versioned(*DATASETS)])
+
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dashboard")
+
+
+def _previous_year(month: str) -> str:
+    return str(sales_month.parse_month(month, "start_month") - 12)
+
+
+# section -> builder(country, params); each reads the same per-snapshot partitions
+# as the standalone endpoint it mirrors
+SECTIONS = {
+    "top_cities": lambda c, p: country_top_cities.for_country(c, p["limit"]),
+    "sales_month": lambda c, p: sales_month.for_country(c, p["start_month"]),
+    "sales_month_prev_year": lambda c, p: sales_month.for_country(c, _previous_year(p["start_month"])),
+    "age_gender": lambda c, p: customers_age_gender.for_country(c),
+    "channels": lambda c, p: countries_by_channel.for_country(c),
+    "channels_by_month": lambda c, p: countries_by_channel_by_month.for_country(c),
+    "top_brands": lambda c, p: top_brands_by_country.for_country(c),
+    "top_categories": lambda c, p: top_categories_by_season.for_country(c, p["season_label"]),
+    "top_products": lambda c, p: {
+        "seasons": top_products.season_labels(c),
+        "data": top_products.for_country(c, p["season_label"]) if p["season_label"] else [],
+    },
+    "top_repurchase": lambda c, p: top_repurchase_by_country.for_country(c),
+}
+
+
+@router.get("/{country}/dashboard")
+@materialized(*DATASETS, maxsize=64)
+def country_dashboard(
+    country: str,
+    sections: Optional[str] = Query(None, description="comma-separated subset of the sections; all by default"),
+    limit: int = Query(10, description="top_cities rows"),
+    start_month: str = Query("2024-06", description="first month of sales_month"),
+    season_label: Optional[str] = Query(None, description="e.g. 'Summer 2025'; filters top_categories and top_products"),
+):
+    wanted = list(SECTIONS) if sections is None else [s.strip() for s in sections.split(",") if s.strip()]
+    unknown = [s for s in wanted if s not in SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections {unknown}; choose from {list(SECTIONS)}")
+
+    params = {"limit": limit, "start_month": start_month, "season_label": season_label}
+    # each section runs in the caller's context, on phase timings of its own that are
+    # merged into the request's
+    futures = {
+        name: _pool.submit(contextvars.copy_context().run, metrics.section, SECTIONS[name], country, params)
+        for name in wanted
+    }
+    return {"country": country, **{name: f.result() for name, f in futures.items()}}
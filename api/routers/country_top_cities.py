@@ -1,20 +1,24 @@
 # api/routers/country_top_cities.py
 from fastapi import APIRouter, Query
-from deps import get_city_summary_df
+from deps import derive, require
+from http_cache import versioned
+from responses import json_response
+from topk import TopK
 
-router = APIRouter(prefix="/country", tags=["country"])
+router = APIRouter(prefix="/country", tags=["country"], dependencies=[versioned("city_summary")])
+require("city_summary", "country", "city", "customers_count",
+        "total_revenue_sek", "total_orders", "avg_order_value_sek")
+
+def _by_customers(df):
+    return TopK(
+        df[["country", "city", "customers_count",
+            "total_revenue_sek", "total_orders", "avg_order_value_sek"]],
+        "country", "customers_count",
+    )
+
+def for_country(country: str, limit: int = 10):
+    return derive("city_summary", "top_cities", _by_customers).get(country, limit)
 
 @router.get("/{country}/top-cities")
 def top_cities(country: str, limit: int = 10):
-    df = get_city_summary_df()[[
-        "country", "city", "customers_count",
-        "total_revenue_sek", "total_orders", "avg_order_value_sek"
-    ]]
-    c = country.strip().casefold()
-    sub = (
-        df[df["country"].str.casefold() == c]
-        .sort_values("customers_count", ascending=False)
-        .head(limit)
-        .reset_index(drop=True)
-    )
-    return {"country": country, "top_cities": sub.to_dict("records")}
+    return json_response({"country": country, "top_cities": for_country(country, limit)})
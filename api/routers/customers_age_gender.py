@@ -1,23 +1,28 @@
 from fastapi import APIRouter, Depends
 import pandas as pd
-from deps import get_customer_summary_df
+from deps import get_customer_summary_df, require
+from http_cache import versioned
+from materialize import materialized
+from partitions import partitioned
 
-router = APIRouter(prefix="/customers_age_gender", tags=["customers"])
+router = APIRouter(prefix="/customers_age_gender", tags=["customers"], dependencies=[versioned("customer_summary")])
+require("customer_summary", "country", "age", "gender")
 
 @router.get("")
+@materialized("customer_summary")
 def customers_age_gender(customers: pd.DataFrame = Depends(get_customer_summary_df)):
     df = customers[["country", "age", "gender"]].copy()
     df = df.dropna(subset=["country", "age", "gender"])
     df = df[df["gender"].isin(["Female", "Male"])]
     df = df[df["age"].between(0, 120)]
-    table = df.groupby(["country", "gender", "age"]).size().rename("count").reset_index()
+    table = df.groupby(["country", "gender", "age"], observed=True).size().rename("count").reset_index()
 
     by_country = {
         country: {
             gender: {str(int(a)): int(c) for a, c in zip(g["age"], g["count"])}
-            for gender, g in grp.groupby("gender", sort=False)
+            for gender, g in grp.groupby("gender", sort=False, observed=True)
         }
-        for country, grp in table.groupby("country", sort=False)
+        for country, grp in table.groupby("country", sort=False, observed=True)
     }
 
     return {
@@ -26,3 +31,21 @@ def customers_age_gender(customers: pd.DataFrame = Depends(get_customer_summary_
         "by_country": by_country,
     }
 
+
+def _by_gender_age(customers: pd.DataFrame) -> dict:
+    df = customers.dropna(subset=["age", "gender"])
+    df = df[df["gender"].isin(["Female", "Male"])]
+    df = df[df["age"].between(0, 120)]
+    table = df.groupby(["gender", "age"], observed=True).size().rename("count").reset_index()
+    return {
+        "ages_sorted": [str(int(a)) for a in sorted(df["age"].unique())],
+        "genders": ["Female", "Male"],
+        "by_gender": {
+            gender: {str(int(a)): int(c) for a, c in zip(g["age"], g["count"])}
+            for gender, g in table.groupby("gender", sort=False, observed=True)
+        },
+    }
+
+def for_country(country: str) -> dict:
+    """Age / gender counts of one country; ages_sorted covers that country only."""
+    return partitioned("customer_summary", "age_gender", ["country"], _by_gender_age).get(country)
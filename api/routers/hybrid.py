@@ -1,12 +1,97 @@
 # routers/hybrid.py
-from fastapi import APIRouter
+import math
+import re
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+from blend import METHODS, SOURCES, get_blender, source_versions
 from deps import get_hybrid_df
+from http_cache import versioned, versioned_by
+from recs import LookupIn, get_index, lookup, rows_response
+from responses import json_response
 
+# the offline hybrid_pairs table is versioned per route; blends on the sources they used
 router = APIRouter(prefix="/hybrid", tags=["hybrid"])
 
-@router.get("")
-def get_all_rows(include_scores: bool = False):
+def _columns(columns, include_scores: bool) -> list[str]:
+    if include_scores:
+        return list(columns)
+    return [c for c in columns if not re.match(r'(?i)^score\b', c)]
+
+def _weights(spec: Optional[str], sources: list[str]) -> dict[str, float]:
+    """"complements:1,basket_cf:0.5" -> weights of the listed `sources`; every one at 1 when None."""
+    if spec is None:
+        return {n: 1.0 for n in sources}
+    weights = {}
+    for part in (p.strip() for p in spec.split(",") if p.strip()):
+        name, _, value = part.partition(":")
+        name = name.strip()
+        if name not in sources:
+            raise HTTPException(status_code=400, detail=f"Unknown source {name!r}; choose from {sources}")
+        try:
+            weight = float(value) if value.strip() else 1.0
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Malformed weight in {part!r}")
+        if not (math.isfinite(weight) and weight >= 0):
+            raise HTTPException(status_code=400, detail=f"Weights must be finite and >= 0, got {part!r}")
+        weights[name] = weight
+    if not any(w > 0 for w in weights.values()):
+        raise HTTPException(status_code=400, detail=f"weights={spec!r} gives no source a positive weight; choose from {sources}")
+    return weights
+
+class BlendIn(BaseModel):
+    product_ids: List[str] = Field(..., max_length=1000)
+    k: int = Field(10, ge=1, le=100)
+
+WEIGHTS = Query(None, description=f"comma-separated source:weight pairs from {list(SOURCES)}; only the listed sources are blended. All at 1 by default")
+METHOD = Query("weighted", description=f"one of {list(METHODS)}: weighted sum of per-row normalized scores, or reciprocal-rank fusion")
+RRF_K = Query(60, ge=1, description="rank offset for method=rrf")
+
+def _method(method: str) -> str:
+    if method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method {method!r}; choose from {list(METHODS)}")
+    return method
+
+@router.get("", dependencies=[versioned("hybrid")])
+def get_all_rows(
+    request: Request,
+    include_scores: bool = False,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+):
     df = get_hybrid_df()
-    if not include_scores:
-        df = df.loc[:, ~df.columns.str.contains(r'(?i)^score\b')]
-    return df.to_dict(orient="records")
+    return rows_response(request, "hybrid", df, _columns(df.columns, include_scores), offset, limit, cursor)
+
+@router.post("/lookup")
+def lookup_rows(body: LookupIn, include_scores: bool = False):
+    cols = _columns(get_index("hybrid").columns, include_scores)
+    return lookup("hybrid", body.product_ids, cols)
+
+@router.post("/blend")
+def blend_rows(body: BlendIn, weights: Optional[str] = WEIGHTS, method: str = METHOD, rrf_k: int = RRF_K):
+    """Fused recommendations for a whole listing page, in request order; unknown ids are listed in `missing`."""
+    blender = get_blender()
+    results = blender.blend(body.product_ids, _weights(weights, list(blender.sources)), body.k, _method(method), rrf_k)
+    return json_response({
+        "data": [{"product_id": p, "recommendations": r} for p, r in zip(body.product_ids, results) if r is not None],
+        "missing": [p for p, r in zip(body.product_ids, results) if r is None],
+    })
+
+@router.get("/{product_id}", dependencies=[versioned_by(source_versions)])
+def get_row(
+    product_id: str,
+    k: int = Query(10, ge=1, le=100),
+    weights: Optional[str] = WEIGHTS,
+    method: str = METHOD,
+    rrf_k: int = RRF_K,
+):
+    """
+    The sources' recommendations for one product fused at request time (see blend.py),
+    so blends can be tuned without rerunning the offline pipeline.
+    """
+    blender = get_blender()
+    result = blender.blend([product_id], _weights(weights, list(blender.sources)), k, _method(method), rrf_k)[0]
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Unknown product id: {product_id}")
+    return json_response({"product_id": product_id, "recommendations": result})
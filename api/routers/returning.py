@@ -1,15 +1,17 @@
 from fastapi import APIRouter
 from deps import get_return_buckets_df
+from http_cache import versioned
+from responses import json_response
 
-router = APIRouter(prefix="/returning", tags=["returning"])
+router = APIRouter(prefix="/returning", tags=["returning"], dependencies=[versioned("return_buckets")])
 
 @router.get("/")
 def get_returning():
     df = get_return_buckets_df()
-    return {
-        "data": df.to_dict(orient="records"),
+    return json_response({
+        "data": df,
         "meta": {
             "total_customers": int(df["customers"].sum()),
             "buckets": int(df.shape[0]),
         },
-    }
+    })
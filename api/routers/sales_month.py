@@ -1,33 +1,67 @@
 # routers/sales_month.py
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 from datetime import datetime, timezone
+from typing import Optional
+import numpy as np
 import pandas as pd
-from deps import get_city_monthly_revenue_df
+from deps import require
+from http_cache import versioned
+from materialize import materialized
+from sales_cube import get_cube
 
-router = APIRouter(prefix="/sales_month", tags=["sales"])
+router = APIRouter(prefix="/sales_month", tags=["sales"], dependencies=[versioned("city_monthly_revenue")])
+require("city_monthly_revenue", "country", "city", "year_month", "total_revenue_sek")
 
-@router.get("")
-def sales_per_month_by_country(start_month: str = Query("2024-06")):
-    df = get_city_monthly_revenue_df()[["country", "year_month", "total_revenue_sek"]].copy()
-    df["month"] = pd.to_datetime(df["year_month"]).dt.to_period("M")
-    df["total_revenue_sek"] = pd.to_numeric(df["total_revenue_sek"]).fillna(0)
+def parse_month(value: str, param: str) -> pd.Period:
+    try:
+        month = pd.Period(value, "M")
+    except ValueError:
+        month = pd.NaT
+    if pd.isna(month):
+        raise HTTPException(status_code=400, detail=f"{param} must be a month like 2024-06, got {value!r}")
+    return month
+
+def _month_range(start_month: str, end_month: Optional[str]) -> tuple[pd.Period, pd.Period]:
+    start_p = parse_month(start_month, "start_month")
+    end_p = parse_month(end_month, "end_month") if end_month else get_cube().last_month
+    if end_month and end_p < start_p:
+        raise HTTPException(status_code=400, detail=f"end_month {end_month!r} is before start_month {start_month!r}")
+    return start_p, end_p
 
-    start_p = pd.Period(start_month, "M")
-    end_p = df["month"].max()
+def _series(months, revenue: np.ndarray, prev: Optional[np.ndarray]) -> list:
+    ksek = np.round(revenue / 1_000).astype(int)
+    if prev is None:
+        return [{"month": str(m), "ksek": int(k)} for m, k in zip(months, ksek)]
+    prev_ksek = np.round(prev / 1_000).astype(int)
+    return [
+        {
+            "month": str(m),
+            "ksek": int(k),
+            "prev_ksek": int(pk),
+            "yoy_pct": round((r - p) / p * 100, 1) if p else None,
+        }
+        for m, k, pk, r, p in zip(months, ksek, prev_ksek, revenue.tolist(), prev.tolist())
+    ]
 
+@router.get("")
+@materialized("city_monthly_revenue")
+def sales_per_month_by_country(
+    start_month: str = Query("2024-06"),
+    end_month: Optional[str] = Query(None, description="last month; defaults to the latest month in the data"),
+    city: Optional[str] = Query(None, description="only this city's revenue (case-insensitive)"),
+    yoy: bool = Query(False, description="add prev_ksek (same month a year earlier) and yoy_pct to each month"),
+):
+    cube = get_cube()
+    start_p, end_p = _month_range(start_month, end_month)
     months = pd.period_range(start=start_p, end=end_p, freq="M")
-    d = df[df["month"].isin(months)]
 
-    by_cm = d.groupby(["country", "month"], as_index=False)["total_revenue_sek"].sum()
-    wide = (
-        by_cm.pivot(index="country", columns="month", values="total_revenue_sek")
-            .reindex(columns=months, fill_value=0)
-    )
-    ksek = (wide / 1_000).round().astype(int)
+    revenue, rows = cube.select(start_p, end_p, city)
+    prev = cube.select(start_p - 12, end_p - 12, city)[0] if yoy else None
+    present = np.flatnonzero(rows.sum(axis=1) > 0)
 
     sales = {
-        country: [{"month": str(m), "ksek": int(ksek.loc[country, m])} for m in months]
-        for country in ksek.index
+        str(cube.countries[i]): _series(months, revenue[i], None if prev is None else prev[i])
+        for i in present
     }
 
     return {
@@ -36,3 +70,16 @@ def sales_per_month_by_country(start_month: str = Query("2024-06")):
         "end_month": str(end_p),
         "generated_at": datetime.now(timezone.utc).isoformat(),
     }
+
+def for_country(country: str, start_month: str = "2024-06", end_month: Optional[str] = None) -> dict:
+    """One country's series in the shape of a sales_month_ksek entry, same month range."""
+    cube = get_cube()
+    start_p, end_p = _month_range(start_month, end_month)
+    months = pd.period_range(start=start_p, end=end_p, freq="M")
+    i = cube.country(country)
+    revenue = cube.select(start_p, end_p)[0][i] if i is not None else np.zeros(len(months))
+    return {
+        "start_month": str(start_p),
+        "end_month": str(end_p),
+        "months": _series(months, revenue, None),
+    }
@@ -1,12 +1,38 @@
 # routers/search.py
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
+from collections import OrderedDict
 from typing import Optional
-import os, requests
+import asyncio, os, time
+import httpx
 
 router = APIRouter(prefix="/search", tags=["search"])
 
 VESPA = os.getenv("VESPA_ENDPOINT", "http://vespa:8080")
-_session = requests.Session()
+TIMEOUT = float(os.getenv("VESPA_TIMEOUT", "8"))            # total budget per search, retries included
+HEDGE_AFTER = float(os.getenv("VESPA_HEDGE_AFTER", "1.0"))  # send a second copy if the first is this slow
+MAX_ATTEMPTS = int(os.getenv("VESPA_MAX_ATTEMPTS", "3"))
+CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "30"))
+CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+
+_client: Optional[httpx.AsyncClient] = None
+_cache: "OrderedDict[tuple, tuple[float, dict]]" = OrderedDict()
+_inflight: dict[tuple, asyncio.Future] = {}
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=VESPA,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30),
+            timeout=httpx.Timeout(TIMEOUT, connect=2.0),
+        )
+    return _client
+
+async def aclose() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
 def qstr(s: str) -> str:
     return '"' + s.replace('\\', '\\\\').replace('"', '\\"') + '"'
@@ -22,8 +48,82 @@ def build_yql(brand: Optional[str], category: Optional[str],
     if size:     parts.append(f"and size contains {qstr(size)}")
     return " ".join(parts)
 
+async def _attempt(params: dict, budget: float) -> httpx.Response:
+    r = await _get_client().get("/search/", params=params, timeout=budget)
+    if r.status_code >= 500:
+        r.raise_for_status()  # retryable; 4xx (bad YQL etc.) is a final answer
+    return r
+
+async def _hedged(params: dict) -> httpx.Response:
+    """
+    Run the query within TIMEOUT. If an attempt is slower than HEDGE_AFTER a second
+    copy is sent and the first good answer wins; failed attempts are retried while
+    budget and MAX_ATTEMPTS remain.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + TIMEOUT
+    pending: set[asyncio.Task] = set()
+    attempts = 0
+    error: Optional[BaseException] = None
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise HTTPException(status_code=504, detail="search backend timed out")
+            if not pending:
+                if attempts >= MAX_ATTEMPTS:
+                    raise HTTPException(status_code=502, detail=f"search backend failed: {error!r}")
+                pending.add(asyncio.create_task(_attempt(params, remaining)))
+                attempts += 1
+            done, pending = await asyncio.wait(
+                pending, timeout=min(HEDGE_AFTER, remaining), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+            if not done and attempts < MAX_ATTEMPTS:
+                pending.add(asyncio.create_task(_attempt(params, deadline - loop.time())))
+                attempts += 1
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def _search(key: tuple, params: dict) -> dict:
+    hit = _cache.get(key)
+    if hit is not None and hit[0] > time.monotonic():
+        _cache.move_to_end(key)
+        return hit[1]
+
+    # identical queries already on the wire share that request
+    fut = _inflight.get(key)
+    if fut is not None:
+        return await asyncio.shield(fut)
+
+    fut = asyncio.get_running_loop().create_future()
+    _inflight[key] = fut
+    try:
+        r = await _hedged(params)
+        payload = r.json()
+        if r.status_code == 200:
+            _cache[key] = (time.monotonic() + CACHE_TTL, payload)
+            _cache.move_to_end(key)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        fut.set_result(payload)
+        return payload
+    except asyncio.CancelledError:
+        fut.cancel()
+        raise
+    except Exception as exc:
+        fut.set_exception(exc)
+        fut.exception()  # mark retrieved when nobody else was waiting
+        raise
+    finally:
+        _inflight.pop(key, None)
+
 @router.get("")
-def search(
+async def search(
     q: str = Query("", description="free-text query"),
     brand: Optional[str] = None,
     category: Optional[str] = None,
@@ -34,5 +134,4 @@ def search(
 ):
     yql = build_yql(brand, category, color, size, audience)
     params = {"yql": yql, "query": q, "hits": str(hits), "ranking": "fusion", "format": "json"}
-    r = _session.get(f"{VESPA}/search/", params=params, timeout=8)
-    return r.json()
\ No newline at end of file
+    return await _search((yql, q, hits), params)
@@ -1,12 +1,33 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
 from deps import get_semantic_similarity_recs_df
+from http_cache import versioned
+from recs import LookupIn, get_index, lookup, rows_response
 
-router = APIRouter(prefix="/semantic_similarity_recs", tags=["semantic_similarity_recs"])
+router = APIRouter(prefix="/semantic_similarity_recs", tags=["semantic_similarity_recs"], dependencies=[versioned("semantic_similarity_recs")])
+
+def _columns(columns) -> list[str]:
+    return [c for c in columns if not c.strip().lower().startswith("score")]
 
 @router.get("")
-def get_all_rows():
+def get_all_rows(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+):
     df = get_semantic_similarity_recs_df()
-    score_cols = [c for c in df.columns if c.strip().lower().startswith("score")]
-    if score_cols:
-        df = df.drop(columns=score_cols)
-    return df.to_dict(orient="records")
+    return rows_response(request, "semantic_similarity_recs", df, _columns(df.columns), offset, limit, cursor)
+
+@router.post("/lookup")
+def lookup_rows(body: LookupIn):
+    cols = _columns(get_index("semantic_similarity_recs").columns)
+    return lookup("semantic_similarity_recs", body.product_ids, cols)
+
+@router.get("/{product_id}")
+def get_row(product_id: str):
+    index = get_index("semantic_similarity_recs")
+    rows = index.rows(product_id, _columns(index.columns))
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"Unknown product id: {product_id}")
+    return rows[0]
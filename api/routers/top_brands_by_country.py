@@ -1,19 +1,28 @@
 # routers/top_brands_by_country.py
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request
 from typing import Optional
-from deps import get_top_brands_df
+from http_cache import versioned
+from partitions import partitioned, prepared
+from responses import tabular_response
 
-router = APIRouter(prefix="/top_brands_by_country", tags=["top_brands_by_country"])
+router = APIRouter(prefix="/top_brands_by_country", tags=["top_brands_by_country"], dependencies=[versioned("top_brands")])
+
+def _ranked(df):
+    return df.sort_values(["country", "rank"], ascending=[True, True]).reset_index(drop=True)
+
+def for_country(country: str):
+    return partitioned("top_brands", "ranked", ["country"], _ranked).get(country)
 
 @router.get("/")
-def top_brands_by_country(country: Optional[str] = Query(None, description="Country filter")):
-    df = get_top_brands_df()
+def top_brands_by_country(
+    request: Request,
+    country: Optional[str] = Query(None, description="Country filter"),
+):
     if country:
-        c = country.strip().casefold()
-        df = df[df["country"].str.casefold() == c]
-
-    df = df.sort_values(["country", "rank"], ascending=[True, True]).reset_index(drop=True)
-    return {
-        "data": df.to_dict(orient="records"),
+        df = for_country(country)
+    else:
+        df = prepared("top_brands", "ranked", _ranked)
+    return tabular_response(request, df, payload={
+        "data": df,
         "meta": {"rows": int(df.shape[0]), "country": country},
-    }
+    })
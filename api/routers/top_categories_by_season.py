@@ -1,19 +1,28 @@
 from fastapi import APIRouter, Query
 from typing import Optional
-from deps import get_top_categories_df
+from http_cache import versioned
+from partitions import partitioned, prepared
+from responses import json_response
 
-router = APIRouter(prefix="/top_categories_by_season", tags=["top_categories_by_season"])
+router = APIRouter(prefix="/top_categories_by_season", tags=["top_categories_by_season"], dependencies=[versioned("top_categories")])
+
+def _ranked(df):
+    return df.sort_values(["country", "season_label", "rank"]).reset_index(drop=True)
+
+def for_country(country: str, season: Optional[str] = None):
+    if season is not None:
+        return partitioned("top_categories", "country_season", ["country", "season_label"], _ranked).get(country, season)
+    return partitioned("top_categories", "country", ["country"], _ranked).get(country)
 
 @router.get("/")
 def top_categories_by_season(
     country: Optional[str] = Query(None, description="ex. Denmark"),
     season: Optional[str] = Query(None, alias="season_label", description="ex. Summer 2025"),
 ):
-    df = get_top_categories_df()
     if country is not None:
-        df = df[df["country"] == country]
-    if season is not None:
-        df = df[df["season_label"] == season]
-
-    df = df.sort_values(["country", "season_label", "rank"]).reset_index(drop=True)
-    return {"data": df.to_dict(orient="records"), "rows": int(df.shape[0])}
+        df = for_country(country, season)
+    elif season is not None:
+        df = partitioned("top_categories", "season", ["season_label"], _ranked).get(season)
+    else:
+        df = prepared("top_categories", "ranked", _ranked)
+    return json_response({"data": df, "rows": int(df.shape[0])})
@@ -2,31 +2,41 @@
 from fastapi import APIRouter, Query
 from typing import Optional
 import pandas as pd
-from deps import get_top_groups_df
+from deps import require
+from http_cache import versioned
+from partitions import partitioned
+from responses import json_response
 
-router = APIRouter(prefix="/top_products_by_season", tags=["top_products_by_season"])
+router = APIRouter(prefix="/top_products_by_season", tags=["top_products_by_season"], dependencies=[versioned("top_groups")])
+require("top_groups", "country", "season_label", "name", "brand", "value", "count", "rank")
+
+def _season_labels(df: pd.DataFrame) -> list:
+    labels = (
+        df["season_label"]
+        .dropna()
+        .drop_duplicates()
+        .sort_values()
+        .tolist()
+    )
+    return [{"season_label": sl} for sl in labels]
+
+def _products(df: pd.DataFrame) -> pd.DataFrame:
+    return (
+        df.loc[:, ["name", "brand", "value", "count", "rank"]]
+          .rename(columns={"name": "product", "value": "product_id"})
+    )
+
+def season_labels(country: str) -> list:
+    return partitioned("top_groups", "season_labels", ["country"], _season_labels).get(country)
+
+def for_country(country: str, season_label: str) -> pd.DataFrame:
+    return partitioned("top_groups", "products", ["country", "season_label"], _products).get(country, season_label)
 
 @router.get("/")
 def get_top_products_by_season(
     country: str = Query(..., description="e.g. 'Denmark'"),
     season_label: Optional[str] = Query(None, description="e.g. 'Summer 2025'"),
 ):
-    df: pd.DataFrame = get_top_groups_df()
-    df = df[df["country"] == country]
-
     if season_label is None:
-        labels = (
-            df["season_label"]
-            .dropna()
-            .drop_duplicates()
-            .sort_values()
-            .tolist()
-        )
-        return {"data": [{"season_label": sl} for sl in labels]}
-
-    rows = (
-        df[df["season_label"] == season_label]
-        .loc[:, ["name", "brand", "value", "count", "rank"]]
-        .rename(columns={"name": "product", "value": "product_id"})
-    )
-    return {"data": rows.to_dict(orient="records")}
\ No newline at end of file
+        return json_response({"data": season_labels(country)})
+    return json_response({"data": for_country(country, season_label)})
\ No newline at end of file
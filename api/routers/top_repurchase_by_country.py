@@ -1,18 +1,25 @@
 # routers/top_repurchase_by_country.py
 from fastapi import APIRouter, Query
-from deps import get_top_repurchase_df
+from deps import require
+from http_cache import versioned
+from partitions import partitioned
+from responses import json_response
 
-router = APIRouter(prefix="/top_repurchase_by_country", tags=["top_repurchase_by_country"])
+router = APIRouter(prefix="/top_repurchase_by_country", tags=["top_repurchase_by_country"], dependencies=[versioned("top_repurchase")])
+require("top_repurchase", "country", "name", "value", "brand", "repurchasers", "rank")
 
-@router.get("/")
-def top_repurchase_by_country(
-    country: str = Query(..., description="Country"),
-):
-    df = get_top_repurchase_df()
-    df = df[df["country"] == country]
-    rows = (
+def _ranked(df):
+    return (
         df.sort_values(["rank", "repurchasers"], ascending=[True, False])
           .loc[:, ["name", "value", "brand", "repurchasers", "rank"]]
           .rename(columns={"name": "product", "value": "product_id"})
     )
-    return {"data": rows.to_dict(orient="records")}
\ No newline at end of file
+
+def for_country(country: str):
+    return partitioned("top_repurchase", "ranked", ["country"], _ranked).get(country)
+
+@router.get("/")
+def top_repurchase_by_country(
+    country: str = Query(..., description="Country"),
+):
+    return json_response({"data": for_country(country)})
\ No newline at end of file
@@ -1,9 +1,29 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
 from deps import get_top_same_brand_df
+from http_cache import versioned
+from recs import LookupIn, get_index, lookup, rows_response
 
-router = APIRouter(prefix="/top_same_brand", tags=["top_same_brand"])
+router = APIRouter(prefix="/top_same_brand", tags=["top_same_brand"], dependencies=[versioned("top_same_brand")])
 
 @router.get("")
-def get_all_rows():
+def get_all_rows(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+):
     df = get_top_same_brand_df()
-    return df.to_dict(orient="records")
+    return rows_response(request, "top_same_brand", df, list(df.columns), offset, limit, cursor)
+
+@router.post("/lookup")
+def lookup_rows(body: LookupIn):
+    return lookup("top_same_brand", body.product_ids, get_index("top_same_brand").columns)
+
+@router.get("/{product_id}")
+def get_row(product_id: str):
+    index = get_index("top_same_brand")
+    rows = index.rows(product_id, index.columns)
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"Unknown product id: {product_id}")
+    return rows[0]
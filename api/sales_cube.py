@@ -0,0 +1,90 @@
+# sales_cube.py (country x month revenue from city_monthly_revenue as dense arrays,
+# built once per snapshot so any month range, city or year-over-year view is a slice)
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import deps
+from partitions import normalize
+
+NAME = "city_monthly_revenue"
+
+
+def _codes(keys: list[pd.Series]) -> tuple[np.ndarray, pd.Index]:
+    """Group number per row (-1 where a key is null) and the sorted group labels."""
+    grouped = pd.Series(0, index=keys[0].index).groupby(keys, observed=True, sort=True)
+    return grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64), grouped.size().index
+
+
+class RevenueCube:
+    """
+    Revenue summed per (country, month) and per (country, city, month) in float arrays
+    whose columns are the consecutive months first..last. Row counts are kept next to
+    the sums so "country has data in this range" means what it did for the groupby.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        revenue = pd.to_numeric(df["total_revenue_sek"]).fillna(0).to_numpy(dtype=np.float64)
+        months = df["year_month"]
+        has_month = months.notna().to_numpy()
+        ordinals = np.where(has_month, months.array.asi8, 0)
+
+        country, self.countries = _codes([df["country"]])
+        pair, pairs = _codes([df["country"], df["city"]])
+
+        valid = has_month & (country >= 0)
+        if valid.any():
+            self.first, self.last = int(ordinals[valid].min()), int(ordinals[valid].max())
+        else:
+            self.first, self.last = 0, -1
+        width = self.last - self.first + 1
+        offset = ordinals - self.first
+
+        def cube(codes: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+            ok = valid & (codes >= 0)
+            flat = codes[ok] * width + offset[ok]
+            sums = np.bincount(flat, weights=revenue[ok], minlength=n * width).reshape(n, width)
+            rows = np.bincount(flat, minlength=n * width).reshape(n, width)
+            return sums, rows
+
+        self.revenue, self.rows = cube(country, len(self.countries))
+        self.city_revenue, self.city_rows = cube(pair, len(pairs))
+
+        self.country_index = {normalize(str(c)): i for i, c in enumerate(self.countries)}
+        country_of = {c: i for i, c in enumerate(self.countries)}
+        self.city_country = np.array([country_of[c] for c, _ in pairs], dtype=np.int64)
+        self.city_index: dict[str, list[int]] = {}
+        for i, (_, city) in enumerate(pairs):
+            self.city_index.setdefault(normalize(str(city)), []).append(i)
+
+    @property
+    def last_month(self) -> pd.Period:
+        return pd.Period(ordinal=self.last, freq="M")
+
+    def _window(self, values: np.ndarray, start: pd.Period, end: pd.Period) -> np.ndarray:
+        """Columns start..end of `values`, zero for months outside the data."""
+        lo, hi = start.ordinal, end.ordinal
+        out = np.zeros((values.shape[0], max(hi - lo + 1, 0)), dtype=values.dtype)
+        a, b = max(lo, self.first), min(hi, self.last)
+        if a <= b:
+            out[:, a - lo:b - lo + 1] = values[:, a - self.first:b - self.first + 1]
+        return out
+
+    def select(self, start: pd.Period, end: pd.Period, city: Optional[str] = None) -> tuple[np.ndarray, np.ndarray]:
+        """(revenue, row counts) per country over months start..end, optionally for one city."""
+        if city is None:
+            return self._window(self.revenue, start, end), self._window(self.rows, start, end)
+        idx = np.array(self.city_index.get(normalize(city), []), dtype=np.int64)
+        revenue = np.zeros((len(self.countries), self.revenue.shape[1]))
+        rows = np.zeros((len(self.countries), self.rows.shape[1]), dtype=np.int64)
+        np.add.at(revenue, self.city_country[idx], self.city_revenue[idx])
+        np.add.at(rows, self.city_country[idx], self.city_rows[idx])
+        return self._window(revenue, start, end), self._window(rows, start, end)
+
+    def country(self, name: str) -> Optional[int]:
+        return self.country_index.get(normalize(name))
+
+
+def get_cube() -> RevenueCube:
+    return deps.derive(NAME, "revenue_cube", RevenueCube)
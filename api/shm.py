@@ -0,0 +1,105 @@
+# shm.py (datasets shared by every worker process: each parquet snapshot is converted
+# once into an uncompressed Arrow IPC file under SHM_DIR, which the workers memory-map)
+#
+# Files are named after the parquet's (mtime, size) and the projected columns, so a
+# given snapshot is only ever converted by one process (under a per-dataset flock) and
+# the others just map it. <name>.current names the newest published file; workers
+# follow it on their next poll, so a swap reaches every worker within one interval.
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# e.g. /dev/shm/itcm; unset = every process reads the parquet files itself
+SHM_DIR = Path(os.environ["DATA_SHM_DIR"]) if os.getenv("DATA_SHM_DIR") else None
+
+Signature = tuple[float, int]
+
+
+def enabled() -> bool:
+    return SHM_DIR is not None
+
+
+def _digest(columns: Optional[list[str]]) -> str:
+    return "all" if columns is None else hashlib.sha1("\0".join(columns).encode()).hexdigest()[:8]
+
+
+def _file(name: str, sig: Signature, columns: Optional[list[str]]) -> Path:
+    mtime, size = sig
+    return SHM_DIR / f"{name}.{int(mtime * 1e9)}.{size}.{_digest(columns)}.arrow"
+
+
+def _pointer(name: str) -> Path:
+    return SHM_DIR / f"{name}.current"
+
+
+@contextmanager
+def _locked(name: str) -> Iterator[None]:
+    SHM_DIR.mkdir(parents=True, exist_ok=True)
+    with open(SHM_DIR / f"{name}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _map(path: Path) -> pa.Table:
+    # buffers point into the mapping: no copy, and the pages are shared with every
+    # other process mapping the same file
+    return ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def _publish(path: Path, write: Callable[[Path], None]) -> None:
+    """`write` a temporary file next to `path`, then rename it over `path`."""
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        # a partial file (e.g. ENOSPC) would otherwise keep the tmpfs full
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def published(name: str) -> Optional[Signature]:
+    """Signature of the snapshot last published for `name`, if any."""
+    try:
+        current = json.loads(_pointer(name).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    return current["mtime"], current["size"]
+
+
+def table(name: str, sig: Signature, columns: Optional[list[str]], build: Callable[[], pa.Table]) -> pa.Table:
+    """
+    The mapped table for snapshot `sig` of dataset `name`. The first caller (in any
+    process) runs `build` and publishes the file; everyone else maps it. Files of
+    older snapshots are unlinked: processes still mapping them keep their pages until
+    they swap, new readers can no longer open them.
+    """
+    path = _file(name, sig, columns)
+    if path.exists():
+        return _map(path)
+    with _locked(name):
+        if not path.exists():
+            t = build()
+
+            def write(tmp: Path) -> None:
+                with pa.OSFile(str(tmp), "wb") as sink, ipc.new_file(sink, t.schema) as writer:
+                    writer.write_table(t)
+
+            _publish(path, write)
+        if sig > (published(name) or (float("-inf"), 0)):
+            pointer = json.dumps({"mtime": sig[0], "size": sig[1], "file": path.name})
+            _publish(_pointer(name), lambda tmp: tmp.write_text(pointer))
+            for old in SHM_DIR.glob(f"{name}.*.arrow"):
+                if old != path:
+                    old.unlink(missing_ok=True)
+    return _map(path)
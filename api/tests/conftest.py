@@ -0,0 +1,37 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# the API modules are imported top-level (uvicorn main:app runs from api/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import deps  # noqa: E402
+
+
+@pytest.fixture
+def datasets(tmp_path, monkeypatch):
+    """
+    deps pointed at parquet files in tmp_path, starting with an empty cache.
+    `datasets(name=df, ...)` (re)writes the files and returns deps.PATHS; None
+    configures a name whose file does not exist. A rewrite gets a later mtime.
+    """
+    paths = {}
+    monkeypatch.setattr(deps, "PATHS", paths)
+    monkeypatch.setattr(deps, "ARROW_DIR", tmp_path / "arrow")
+    deps.clear_cache()
+
+    def write(**frames):
+        for name, df in frames.items():
+            path = paths[name] = tmp_path / f"{name}.parquet"
+            if df is None:
+                continue
+            before = path.stat().st_mtime if path.exists() else None
+            df.to_parquet(path)
+            if before is not None:
+                os.utime(path, (before + 10, before + 10))
+        return paths
+
+    yield write
+    deps.clear_cache()
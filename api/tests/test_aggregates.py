@@ -0,0 +1,57 @@
+import json
+
+import pandas as pd
+import pytest
+
+import aggregates
+import deps
+import main  # noqa: F401  (build() imports it; registered before REGISTRY is swapped below)
+import materialize
+from materialize import materialized, query_key
+
+
+@pytest.fixture
+def store(datasets, tmp_path, monkeypatch):
+    datasets(orders=pd.DataFrame({"n": [1, 2, 3]}))
+    monkeypatch.setattr(aggregates, "STORE", tmp_path / "aggregates")
+    monkeypatch.setattr(aggregates, "MANIFEST", tmp_path / "aggregates" / "manifest.json")
+    monkeypatch.setattr(materialize, "REGISTRY", {})
+    calls = []
+
+    @materialized("orders")
+    def total(limit: int = 2):
+        calls.append(limit)
+        return {"total": int(deps._read("orders")["n"].head(limit).sum())}
+
+    return total, calls
+
+
+def test_build_writes_default_payloads_served_without_computing(store):
+    total, calls = store
+    artifact = aggregates.build()
+    assert artifact is not None and calls == [2]
+
+    endpoint = f"{total.__module__}:{total.__name__}"
+    versions = {"orders": deps.version("orders")}
+    body = aggregates.lookup(endpoint, query_key({"limit": 2}), versions)
+    assert json.loads(body) == {"total": 3}
+
+    total.cache_clear()
+    assert total(limit=2).body == body
+    assert calls == [2]  # served from the artifact
+
+
+def test_artifact_is_only_used_for_the_versions_it_was_built_from(store, datasets):
+    total, calls = store
+    aggregates.build()
+    endpoint = f"{total.__module__}:{total.__name__}"
+    assert aggregates.lookup(endpoint, query_key({"limit": 2}), {"orders": -1.0}) is None
+    assert aggregates.lookup(endpoint, query_key({"limit": 5}), {"orders": deps.version("orders")}) is None
+
+    assert aggregates.build() is None  # same snapshot: nothing to do
+    datasets(orders=pd.DataFrame({"n": [10, 20]}))
+    deps.refresh()
+    deps.refresh()
+    assert aggregates.build() is not None
+    assert json.loads(total(limit=2).body) == {"total": 30}
+    assert calls == [2, 2]
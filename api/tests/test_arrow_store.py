@@ -0,0 +1,63 @@
+import os
+
+import pandas as pd
+import pytest
+
+import arrow_store
+import deps
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "country": ["Sweden", "Denmark", "Sweden"],
+        "city": ["Malmö", None, "Lund"],
+        "year_month": ["2024-01", None, "2024-03"],
+        "product": ["a", "b", "c"],
+        "n": [1, 2, 3],
+        "revenue": [1.5, None, 3.0],
+    })
+
+
+def test_feather_copy_loads_the_same_frame_as_the_parquet(datasets, monkeypatch):
+    datasets(sales=_frame())
+    parquet = deps._read("sales")
+    assert deps.cache_stats()["datasets"]["sales"]["source"] == "parquet"
+
+    deps.clear_cache()
+    monkeypatch.setattr(deps, "WRITE_ARROW", True)
+    feather = deps._read("sales")
+    assert deps.cache_stats()["datasets"]["sales"]["source"] == "arrow"
+    pd.testing.assert_frame_equal(feather, parquet)
+    assert isinstance(feather["year_month"].dtype, pd.PeriodDtype)
+    assert str(feather["product"].dtype) == "string"
+
+
+def test_copy_of_another_snapshot_is_ignored(datasets, tmp_path):
+    paths = datasets(sales=_frame())
+    sig = deps._signature(paths["sales"])
+    arrow_store.convert(paths["sales"], tmp_path / "arrow", sig, deps._optimize)
+    assert arrow_store.open_table(paths["sales"], tmp_path / "arrow", sig) is not None
+    assert arrow_store.open_table(paths["sales"], tmp_path / "arrow", (sig[0] + 1, sig[1])) is None
+
+
+def test_refresh_swaps_a_decoded_snapshot_for_its_feather_copy(datasets, tmp_path):
+    paths = datasets(sales=_frame())
+    deps.preload()
+    assert deps.cache_stats()["datasets"]["sales"]["source"] == "parquet"
+    arrow_store.convert(paths["sales"], tmp_path / "arrow", deps._signature(paths["sales"]), deps._optimize)
+    deps.refresh()
+    stats = deps.cache_stats()["datasets"]["sales"]
+    assert stats["source"] == "arrow" and stats["version"] == os.stat(paths["sales"]).st_mtime
+
+
+def test_failed_conversion_leaves_no_temporary_file(datasets, tmp_path, monkeypatch):
+    paths = datasets(sales=_frame())
+
+    def full(table, dest, **kwargs):
+        open(dest, "wb").write(b"partial")
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(arrow_store.feather, "write_feather", full)
+    with pytest.raises(OSError):
+        arrow_store.convert(paths["sales"], tmp_path / "arrow", deps._signature(paths["sales"]), deps._optimize)
+    assert list((tmp_path / "arrow").iterdir()) == []
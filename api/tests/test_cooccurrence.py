@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import cooccurrence
+import deps
+import main
+from cooccurrence import CoOccurrence
+
+
+def _order_items(orders) -> pd.DataFrame:
+    rows = [(o, p) for o, products in orders for p in products]
+    return pd.DataFrame(rows, columns=["order_id", "product_id"])
+
+
+@pytest.fixture
+def order_items(datasets, monkeypatch):
+    datasets(order_items=_order_items([(1, ["a", "b"]), (2, ["a", "c"])]))
+    monkeypatch.setattr(cooccurrence, "_latest", None)
+    builds = []
+    build = CoOccurrence.build.__func__
+    monkeypatch.setattr(CoOccurrence, "build", classmethod(lambda cls, df: builds.append(len(df)) or build(cls, df)))
+    return datasets, builds
+
+
+def test_engine_is_built_by_preload_not_by_requests(order_items):
+    _, builds = order_items
+    deps.preload()
+    assert builds == [4]
+    engine = cooccurrence.get_engine()
+    assert cooccurrence.get_engine() is engine
+    assert builds == [4]
+    data, missing = engine.score(["a", "zz"], 5)
+    assert [r["product_id"] for r in data] == ["b", "c"] and missing == ["zz"]
+
+
+def test_refresh_extends_the_engine_for_appended_orders(order_items):
+    datasets, builds = order_items
+    deps.preload()
+    datasets(order_items=_order_items([(1, ["a", "b"]), (2, ["a", "c"]), (3, ["b", "c"])]))
+    deps.refresh()  # seen once: pending
+    assert cooccurrence.get_engine().rows == 4
+    assert deps.refresh() == ["order_items"]
+    engine = cooccurrence.get_engine()
+    assert engine.rows == 6 and builds == [4]
+    assert engine.counts[engine._lookup.get_loc("b"), engine._lookup.get_loc("c")] == 1
+
+
+def test_engine_missing_for_the_snapshot_is_unavailable(order_items, monkeypatch):
+    monkeypatch.delitem(deps._on_load[cooccurrence.NAME], "cooccurrence")
+    deps.preload()
+    with pytest.raises(deps.DatasetUnavailable):
+        cooccurrence.get_engine()
+
+
+def test_score_works_after_a_preload_without_the_lifespan(order_items):
+    # as bench/run.py runs the app: preload(), then requests, no startup hooks
+    deps.preload()
+    r = TestClient(main.app).post("/basket_cf/score", json={"product_ids": ["b"], "k": 5})
+    assert r.status_code == 200
+    assert [row["product_id"] for row in r.json()["data"]] == ["a"]
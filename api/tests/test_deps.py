@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import deps
+
+
+@pytest.fixture
+def data(datasets):
+    """A good dataset and a truncated one."""
+    df = pd.DataFrame({"country": ["Sweden"], "n": [1]})
+    paths = datasets(good=df, bad=df)
+    paths["bad"].write_bytes(paths["good"].read_bytes()[:20])
+
+
+def test_preload_skips_a_broken_dataset(data):
+    deps.preload()
+    assert list(deps._read("good")["country"]) == ["Sweden"]
+    assert "bad" not in deps._snapshots
+
+
+def test_broken_dataset_is_unavailable_on_demand(data):
+    deps.preload()
+    with pytest.raises(deps.DatasetUnavailable):
+        deps._read("bad")
+
+
+def test_failed_on_demand_load_is_not_retried_per_request(data, monkeypatch):
+    loads = []
+    load = deps._load
+    monkeypatch.setattr(deps, "_load", lambda name, sig=None: loads.append(name) or load(name, sig))
+    for _ in range(3):
+        with pytest.raises(deps.DatasetUnavailable):
+            deps._read("bad")
+    assert loads == ["bad"]
+
+
+def test_null_year_month_becomes_nat():
+    df = deps._optimize(pd.DataFrame({"year_month": ["2024-01", None, "2024-03"], "total_revenue_sek": [1.0, 2.0, 3.0]}))
+    assert isinstance(df["year_month"].dtype, pd.PeriodDtype)
+    assert df["year_month"].isna().tolist() == [False, True, False]
+    assert str(df["year_month"].iloc[2]) == "2024-03"
+
+
+def test_dataset_missing_at_startup_is_loaded_once_its_file_settles(datasets):
+    datasets(late=None)
+    deps.preload()
+    with pytest.raises(deps.DatasetUnavailable):
+        deps._read("late")
+
+    datasets(late=pd.DataFrame({"n": [1, 2]}))
+    assert deps.refresh() == []  # first sighting: could still be copying
+    with pytest.raises(deps.DatasetUnavailable):
+        deps._read("late")
+    assert deps.refresh() == ["late"]
+    assert deps._read("late")["n"].tolist() == [1, 2]
+    assert deps.cache_stats()["datasets"]["late"]["resident"]
+
+
+def test_broken_dataset_is_loaded_when_its_file_is_replaced(data, datasets):
+    deps.preload()
+    assert deps.refresh() == [] and deps.refresh() == []  # the same broken file isn't retried
+
+    datasets(bad=pd.DataFrame({"n": [3]}))
+    deps.refresh()
+    assert deps.refresh() == ["bad"]
+    assert deps._read("bad")["n"].tolist() == [3]
+
+
+def _frame(n: int = 1000) -> pd.DataFrame:
+    return pd.DataFrame({"n": range(n)})
+
+
+def test_budget_evicts_the_least_recently_used_dataset(datasets, monkeypatch):
+    datasets(a=_frame(), b=_frame(), c=_frame())
+    deps._read("a")
+    size = deps.cache_stats()["datasets"]["a"]["bytes"]
+    deps.clear_cache()
+    monkeypatch.setattr(deps, "MAX_BYTES", 2 * size + 1)
+    deps._read("a")
+    deps._read("b")
+    deps._read("a")
+    deps._read("c")
+    assert sorted(deps._snapshots) == ["a", "c"]
+    assert deps.cache_stats()["resident_bytes"] <= deps.MAX_BYTES
+    assert deps._read("b")["n"].tolist() == list(range(1000))  # reloaded on demand
+
+
+def test_swap_releases_what_was_derived_from_the_old_snapshot(datasets):
+    datasets(a=_frame())
+    deps.preload()
+    deps.derive("a", "doubled", lambda df: df["n"] * 2)
+    deps.arrow_table("a")
+    assert {k for k in deps._derived if k[0] == "a"} == {("a", "doubled"), ("a", "arrow")}
+
+    datasets(a=_frame(10))
+    deps.refresh()
+    assert deps.refresh() == ["a"]
+    assert not any(k[0] == "a" for k in deps._derived)
+    assert deps.cache_stats()["datasets"]["a"]["derived_bytes"] == 0
+
+
+def test_derived_objects_count_toward_the_budget(datasets, monkeypatch):
+    datasets(a=_frame(), b=_frame())
+    deps._read("b")
+    deps._read("a")
+    monkeypatch.setattr(deps, "MAX_BYTES", deps.cache_stats()["resident_bytes"] + 1000)
+
+    deps.derive("a", "big", lambda df: np.zeros(100_000))
+    stats = deps.cache_stats()
+    assert stats["datasets"]["a"]["derived_bytes"] >= 800_000
+    assert "b" not in deps._snapshots  # evicted to make room
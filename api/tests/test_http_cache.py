@@ -0,0 +1,67 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import deps
+import http_cache
+from compression import CompressionMiddleware
+from http_cache import ConditionalMiddleware
+
+
+def _client(monkeypatch, versions=None) -> TestClient:
+    versions = {"orders": 1.0} if versions is None else versions
+    monkeypatch.setattr(deps, "version", lambda name: versions[name])
+    app = FastAPI()
+
+    @app.get("/rows", dependencies=[http_cache.versioned("orders")])
+    def rows():
+        return [{"n": i} for i in range(500)]
+
+    app.add_middleware(ConditionalMiddleware)
+    app.add_middleware(CompressionMiddleware)
+    return TestClient(app)
+
+
+def test_304_repeats_the_compressed_tag_and_vary(monkeypatch):
+    client = _client(monkeypatch)
+    first = client.get("/rows", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip"
+    tag = first.headers["etag"]
+    assert tag.endswith('-gzip"')
+
+    again = client.get("/rows", headers={"Accept-Encoding": "gzip", "If-None-Match": tag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == tag
+    assert "Accept-Encoding" in again.headers["vary"]
+
+
+def test_304_for_an_uncompressed_tag(monkeypatch):
+    client = _client(monkeypatch)
+    tag = client.get("/rows", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    again = client.get("/rows", headers={"Accept-Encoding": "identity", "If-None-Match": tag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == tag
+    assert "vary" not in again.headers
+
+
+def test_etag_follows_the_dataset_version(monkeypatch):
+    versions = {"orders": 1.0}
+    client = _client(monkeypatch, versions)
+    first = client.get("/rows")
+    tag = first.headers["etag"]
+    assert first.headers["cache-control"] == http_cache.CACHE_CONTROL
+
+    again = client.get("/rows", headers={"If-None-Match": tag})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["cache-control"] == http_cache.CACHE_CONTROL
+
+    versions["orders"] = 2.0
+    fresh = client.get("/rows", headers={"If-None-Match": tag})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != tag
+
+
+def test_etag_covers_the_query_and_accept_but_not_param_order(monkeypatch):
+    client = _client(monkeypatch)
+    tag = client.get("/rows?a=1&b=2").headers["etag"]
+    assert client.get("/rows?b=2&a=1").headers["etag"] == tag
+    assert client.get("/rows?a=1&b=3").headers["etag"] != tag
+    assert client.get("/rows?a=1&b=2", headers={"Accept": "application/x-ndjson"}).headers["etag"] != tag
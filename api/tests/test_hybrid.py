@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import blend
+import deps
+import main
+from routers import hybrid
+
+SOURCES = ["complements", "basket_cf"]
+
+
+def _weights(spec):
+    return hybrid._weights(spec, SOURCES)
+
+
+@pytest.mark.parametrize("spec", ["complements:inf", "complements:nan", "complements:-1", "basket_cf:1e400"])
+def test_weights_must_be_finite_and_non_negative(spec):
+    with pytest.raises(HTTPException) as err:
+        _weights(spec)
+    assert err.value.status_code == 400
+
+
+@pytest.mark.parametrize("spec", ["", " , ", "complements:0", "complements:0,basket_cf:0"])
+def test_weights_selecting_nothing_are_a_bad_request(spec):
+    with pytest.raises(HTTPException) as err:
+        _weights(spec)
+    assert err.value.status_code == 400
+    assert "positive weight" in err.value.detail
+
+
+def test_weights():
+    assert _weights(None) == {"complements": 1.0, "basket_cf": 1.0}
+    assert _weights("basket_cf:0.5, complements") == {"basket_cf": 0.5, "complements": 1.0}
+    assert _weights("complements:0,basket_cf:2") == {"complements": 0.0, "basket_cf": 2.0}
+
+
+def test_blender_covers_the_sources_deps_can_serve(datasets, monkeypatch):
+    datasets(**{n: None for n in blend.SOURCES})
+    datasets(complements=pd.DataFrame({"Product ID": ["a"], "Top 1": ["b"], "Score 1": [1.0]}))
+    monkeypatch.setattr(blend, "_cached", (None, None))
+    deps.preload()
+    blender = blend.get_blender()
+    assert list(blender.sources) == ["complements"]
+    assert blend.get_blender() is blender
+    assert blender.blend(["a"], hybrid._weights(None, list(blender.sources)), 5)[0][0]["product_id"] == "b"
+
+
+def test_row_is_served_and_tagged_from_the_sources_it_blends(datasets, monkeypatch):
+    datasets(**{n: None for n in blend.SOURCES})
+    datasets(complements=pd.DataFrame({"Product ID": ["a"], "Top 1": ["b"], "Score 1": [1.0]}))
+    monkeypatch.setattr(blend, "_cached", (None, None))
+    deps.preload()
+    client = TestClient(main.app)
+
+    first = client.get("/hybrid/a")
+    assert first.status_code == 200  # not 503 for the three sources that are missing
+    assert [r["product_id"] for r in first.json()["recommendations"]] == ["b"]
+    assert client.get("/hybrid/a", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    datasets(basket_cf=pd.DataFrame({"Product ID": ["a"], "Top 1": ["c"], "Score 1": [1.0]}))
+    deps.refresh()
+    assert deps.refresh() == ["basket_cf"]
+    again = client.get("/hybrid/a", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 200 and again.headers["etag"] != first.headers["etag"]
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import aggregates
+import deps
+from materialize import materialized
+
+
+@pytest.fixture
+def versions(tmp_path, monkeypatch):
+    """Dataset versions the decorated endpoints see; no prebuilt artifact."""
+    current = {"orders": 1.0}
+    monkeypatch.setattr(deps, "version", lambda name: current[name])
+    monkeypatch.setattr(aggregates, "MANIFEST", tmp_path / "manifest.json")
+    return current
+
+
+def _endpoint(maxsize: int):
+    calls = []
+
+    @materialized("orders", maxsize=maxsize)
+    def endpoint(limit: int = 10):
+        calls.append(limit)
+        return {"limit": limit}
+
+    return endpoint, calls
+
+
+def test_body_is_computed_once_per_variant(versions):
+    endpoint, calls = _endpoint(maxsize=4)
+    first = endpoint(limit=3)
+    assert endpoint(limit=3).body == first.body
+    assert json.loads(first.body) == {"limit": 3}
+    assert calls == [3]
+
+
+def test_variants_are_bounded_least_recently_used_first(versions):
+    endpoint, calls = _endpoint(maxsize=2)
+    endpoint(limit=1)
+    endpoint(limit=2)
+    endpoint(limit=1)  # 1 is now the most recent
+    endpoint(limit=3)  # evicts 2
+    endpoint(limit=1)
+    endpoint(limit=2)
+    assert calls == [1, 2, 3, 2]
+
+
+def test_new_dataset_version_drops_every_variant(versions):
+    endpoint, calls = _endpoint(maxsize=4)
+    endpoint(limit=1)
+    endpoint(limit=2)
+    versions["orders"] = 2.0
+    endpoint(limit=1)
+    endpoint(limit=2)
+    assert calls == [1, 2, 1, 2]
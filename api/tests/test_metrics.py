@@ -0,0 +1,80 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+import metrics
+
+
+def _series(text: str, name: str, **labels) -> float:
+    """Value of the sample `name{labels}` in a Prometheus text dump."""
+    want = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{{want}}} "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"no sample {name}{{{want}}}")
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = metrics.Histogram("t_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 5.0):
+        h.observe(v, "/x")
+    text = "\n".join(h.render())
+    assert _series(text, "t_seconds_bucket", route="/x", le="0.1") == 1
+    assert _series(text, "t_seconds_bucket", route="/x", le="1.0") == 3
+    assert _series(text, "t_seconds_bucket", route="/x", le="+Inf") == 4
+    assert _series(text, "t_seconds_count", route="/x") == 4
+    assert _series(text, "t_seconds_sum", route="/x") == 6.05
+
+
+def test_requests_are_recorded_per_route_template():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: str):
+        with metrics.phase("load"):
+            time.sleep(0.01)
+        return {"id": item_id}
+
+    @app.get("/metrics")
+    def scrape():
+        return PlainTextResponse(metrics.render())
+
+    app.add_middleware(metrics.MetricsMiddleware)
+    client = TestClient(app)
+    for i in range(3):
+        client.get(f"/items/{i}")
+    text = client.get("/metrics").text
+
+    # the registry is process-wide; no other test serves this route
+    assert _series(text, "api_request_duration_seconds_count", method="GET", route="/items/{item_id}", status="200") == 3
+    assert "route=\"/items/0\"" not in text
+    assert _series(text, "api_request_phase_seconds_sum", route="/items/{item_id}", phase="load") >= 0.03
+    assert _series(text, "api_response_bytes_count", route="/items/{item_id}") >= 3
+
+
+def test_parallel_sections_keep_their_own_phase_stack():
+    request = metrics._Phases()
+    token = metrics._current.set(request)
+    barrier = threading.Barrier(2)
+
+    def load():
+        with metrics.phase("load"):
+            barrier.wait()
+            time.sleep(0.05)
+            barrier.wait()
+
+    try:
+        with ThreadPoolExecutor(2) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, metrics.section, load) for _ in range(2)]
+            [f.result() for f in futures]
+    finally:
+        metrics._current.reset(token)
+
+    # each section's 50 ms counts once; on one shared stack the second enter paused the first
+    assert request.totals["load"] >= 0.09
+    assert request._stack == []
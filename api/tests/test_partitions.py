@@ -0,0 +1,43 @@
+import pandas as pd
+
+import deps
+from partitions import Partitions, partitioned
+
+
+def _sales() -> pd.DataFrame:
+    return pd.DataFrame({
+        "country": ["Sweden", "Denmark", " sweden", None, "Denmark"],
+        "season": ["Summer", "Summer", "Winter", "Summer", "Winter"],
+        "revenue": [5, 4, 3, 2, 1],
+    })
+
+
+def _by_revenue(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values("revenue").reset_index(drop=True)
+
+
+def test_slices_match_a_normalized_mask():
+    df = _sales()
+    parts = Partitions(df, ["country"], _by_revenue)
+    mask = df["country"].str.strip().str.casefold() == "sweden"
+    pd.testing.assert_frame_equal(parts.get("SWEDEN "), _by_revenue(df[mask]))
+    assert parts.get("Norway").empty and list(parts.get("Norway").columns) == list(df.columns)
+
+
+def test_several_keys_and_null_keys():
+    parts = Partitions(_sales(), ["country", "season"], lambda d: d["revenue"].tolist())
+    assert parts.get("denmark", "winter") == [1]
+    assert parts.get("sweden", "summer") == [5]
+    assert sum(len(v) for v in parts.slices.values()) == 4  # the row without a country is in none
+
+
+def test_partitions_are_built_once_per_snapshot(datasets):
+    datasets(sales=_sales())
+    first = partitioned("sales", "by_revenue", ["country"], _by_revenue)
+    assert partitioned("sales", "by_revenue", ["country"], _by_revenue) is first
+
+    datasets(sales=_sales().head(2))
+    deps.refresh()
+    deps.refresh()
+    second = partitioned("sales", "by_revenue", ["country"], _by_revenue)
+    assert second is not first and len(second.get("sweden")) == 1
@@ -0,0 +1,94 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+from starlette.responses import JSONResponse
+
+import deps
+import main
+from recs import RecIndex
+from responses import ARROW_STREAM, NDJSON, PARQUET
+
+
+def _table() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Product ID": ["1", "2"],
+        "Top 1": ["10", "20"],
+        "Score 1": [0.5, np.nan],
+        "Top 2": ["11", None],
+        "Score 2": [np.nan, np.nan],
+    })
+
+
+def test_rows_return_nan_and_missing_as_null():
+    index = RecIndex(_table())
+    row = index.rows("2", list(index.columns))[0]
+    assert row == {"Product ID": "2", "Top 1": "20", "Score 1": None, "Top 2": None, "Score 2": None}
+
+
+def test_rows_render_with_allow_nan_false():
+    index = RecIndex(_table())
+    rows = index.rows("1", list(index.columns))
+    body = JSONResponse(rows).body  # raised ValueError on NaN before
+    assert json.loads(body) == [{"Product ID": "1", "Top 1": "10", "Score 1": 0.5, "Top 2": "11", "Score 2": None}]
+
+
+@pytest.fixture
+def client(datasets):
+    datasets(complements=pd.DataFrame({
+        "Product ID": [str(i) for i in range(5)],
+        "Top 1": [str(i + 10) for i in range(5)],
+        "Score 1": [0.5, 0.25, 0.125, 1.0, 0.75],
+    }))
+    return TestClient(main.app)
+
+
+def test_arrow_and_parquet_carry_the_json_rows(client):
+    url = "/complements?include_scores=true&offset=1&limit=3"
+    rows = client.get(url).json()
+    assert [r["Product ID"] for r in rows] == ["1", "2", "3"]
+
+    arrow = client.get(url, headers={"Accept": ARROW_STREAM})
+    assert arrow.headers["content-type"] == ARROW_STREAM and "Accept" in arrow.headers["vary"]
+    assert pa.ipc.open_stream(arrow.content).read_all().to_pylist() == rows
+
+    parquet = client.get(url, headers={"Accept": PARQUET})
+    assert parquet.headers["content-type"] == PARQUET
+    assert pq.read_table(io.BytesIO(parquet.content)).to_pylist() == rows
+
+
+def test_binary_formats_project_columns(client):
+    arrow = client.get("/complements", headers={"Accept": ARROW_STREAM})
+    assert pa.ipc.open_stream(arrow.content).read_all().column_names == ["Product ID", "Top 1"]
+
+
+def test_cursor_pages_through_the_table(client):
+    first = client.get("/complements?limit=2")
+    assert first.headers["x-total-count"] == "5"
+    seen = [r["Product ID"] for r in first.json()]
+    cursor = first.headers["x-next-cursor"]
+    while cursor:
+        page = client.get(f"/complements?limit=2&cursor={cursor}")
+        seen += [r["Product ID"] for r in page.json()]
+        cursor = page.headers.get("x-next-cursor")
+    assert seen == ["0", "1", "2", "3", "4"]
+
+
+def test_cursor_from_a_replaced_snapshot_is_gone(client, datasets):
+    cursor = client.get("/complements?limit=2").headers["x-next-cursor"]
+    datasets(complements=pd.DataFrame({"Product ID": ["9"], "Top 1": ["8"], "Score 1": [1.0]}))
+    deps.refresh()
+    assert deps.refresh() == ["complements"]
+    gone = client.get(f"/complements?limit=2&cursor={cursor}")
+    assert gone.status_code == 410
+    assert client.get("/complements?limit=2&cursor=not-a-cursor").status_code == 400
+
+
+def test_ndjson_streams_one_row_per_line(client):
+    r = client.get("/complements", headers={"Accept": NDJSON})
+    assert [json.loads(line)["Product ID"] for line in r.text.splitlines()] == ["0", "1", "2", "3", "4"]
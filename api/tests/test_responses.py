@@ -0,0 +1,43 @@
+import json
+
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from responses import dumps, ndjson, records
+
+
+def _baseline(df: pd.DataFrame) -> bytes:
+    # what the routers returned before responses.py: records through FastAPI's encoder
+    return JSONResponse(jsonable_encoder(df.to_dict(orient="records"))).body
+
+
+DATES = pd.to_datetime(["2024-01-01 00:00:00", "2024-02-15 13:45:10", "2024-03-01 00:00:00.250"], format="ISO8601")
+
+
+def test_datetime_column_matches_baseline_bytes():
+    df = pd.DataFrame({"order_date": DATES, "n": [1, 2, 3]})
+    assert records(df) == _baseline(df)
+
+
+def test_datetime_column_matches_baseline_bytes_with_floats():
+    df = pd.DataFrame({"order_date": DATES, "total_sek": [1.5, 2.25, 0.1]})
+    assert records(df) == _baseline(df)
+
+
+def test_both_encoders_agree_on_dates_and_nat():
+    df = pd.DataFrame({"order_date": pd.to_datetime(["2024-01-01", None]), "n": [1, 2]})
+    with_floats = df.assign(x=[0.5, 1.5])
+    assert json.loads(records(df))[0]["order_date"] == json.loads(records(with_floats))[0]["order_date"] == "2024-01-01T00:00:00"
+    assert json.loads(records(df))[1]["order_date"] is None
+    assert [json.loads(line) for line in ndjson(df).splitlines()] == json.loads(records(df))
+    assert dumps({"rows": df}) == b'{"rows":' + records(df) + b"}"
+
+
+def test_period_column_without_floats():
+    df = pd.DataFrame({"year_month": pd.PeriodIndex(["2024-01", None, "2024-03"], freq="M"), "n": [1, 2, 3]})
+    assert json.loads(records(df)) == [
+        {"year_month": "2024-01", "n": 1}, {"year_month": None, "n": 2}, {"year_month": "2024-03", "n": 3},
+    ]
+    assert [json.loads(line) for line in ndjson(df).splitlines()] == json.loads(records(df))
+    assert json.loads(records(df.assign(x=0.5)))[0]["year_month"] == "2024-01"
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+from routers import country_dashboard
+
+
+@pytest.fixture
+def client(datasets):
+    datasets(city_monthly_revenue=pd.DataFrame({
+        "country": ["Sweden", "Sweden", "Sweden", "Denmark", "Denmark"],
+        "city": ["Malmö", "Lund", "Malmö", "Aarhus", "Aarhus"],
+        "year_month": ["2023-06", "2024-06", "2024-06", "2024-06", "2024-07"],
+        "total_revenue_sek": [1000.0, 2000.0, 4000.0, 8000.0, 16000.0],
+    }))
+    return TestClient(main.app)
+
+
+def test_months_are_summed_per_country_over_the_range(client):
+    body = client.get("/sales_month?start_month=2024-06&end_month=2024-07&yoy=true").json()
+    assert body["start_month"] == "2024-06" and body["end_month"] == "2024-07"
+    assert body["sales_month_ksek"]["Sweden"] == [
+        {"month": "2024-06", "ksek": 6, "prev_ksek": 1, "yoy_pct": 500.0},
+        {"month": "2024-07", "ksek": 0, "prev_ksek": 0, "yoy_pct": None},
+    ]
+    assert [m["ksek"] for m in body["sales_month_ksek"]["Denmark"]] == [8, 16]
+
+    city = client.get("/sales_month?start_month=2024-06&city=malmö").json()["sales_month_ksek"]
+    assert list(city) == ["Sweden"] and city["Sweden"][0]["ksek"] == 4
+
+
+@pytest.mark.parametrize("query", [
+    "start_month=someday", "start_month=2024-13", "start_month=", "end_month=soon",
+    "start_month=2024-07&end_month=2024-06",
+])
+def test_bad_month_ranges_are_a_bad_request(client, query):
+    r = client.get(f"/sales_month?{query}")
+    assert r.status_code == 400, r.text
+
+
+def test_dashboard_sections_reject_a_bad_start_month(client):
+    for section in ("sales_month", "sales_month_prev_year"):
+        with pytest.raises(HTTPException) as err:
+            country_dashboard.SECTIONS[section]("Sweden", {"start_month": "nope"})
+        assert err.value.status_code == 400
+    months = country_dashboard.SECTIONS["sales_month"]("Sweden", {"start_month": "2024-06"})["months"]
+    assert [m["ksek"] for m in months] == [6, 0]
@@ -0,0 +1,77 @@
+import asyncio
+
+import httpx
+import pytest
+
+from routers import search
+
+
+@pytest.fixture
+def vespa(monkeypatch):
+    """A stubbed Vespa: `vespa(delays)` answers call i after delays[i] seconds (the last delay repeats)."""
+    monkeypatch.setattr(search, "_cache", search.OrderedDict())
+    monkeypatch.setattr(search, "_inflight", {})
+    calls = []
+
+    def install(*delays: float):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            n = len(calls)
+            calls.append(request.url.params["query"])
+            await asyncio.sleep(delays[min(n, len(delays) - 1)])
+            return httpx.Response(200, json={"root": {"attempt": n}})
+
+        monkeypatch.setattr(search, "_client", httpx.AsyncClient(base_url="http://vespa", transport=httpx.MockTransport(handler)))
+        return calls
+
+    yield install
+    monkeypatch.setattr(search, "_client", None)
+
+
+def _run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await search.aclose()
+    return asyncio.run(main())
+
+
+def test_concurrent_identical_queries_share_one_upstream_call(vespa):
+    calls = vespa(0.05)
+
+    async def burst():
+        return await asyncio.gather(*(search.search(q="shoes") for _ in range(5)), search.search(q="hats"))
+
+    results = _run(burst())
+    assert sorted(calls) == ["hats", "shoes"]
+    assert all(r == results[0] for r in results[:5])
+
+
+def test_slow_primary_is_hedged(vespa, monkeypatch):
+    monkeypatch.setattr(search, "HEDGE_AFTER", 0.05)
+    calls = vespa(2.0, 0.0)  # the primary hangs, the hedge answers at once
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await search.search(q="shoes")
+        return result, loop.time() - start
+
+    result, elapsed = _run(timed())
+    assert result == {"root": {"attempt": 1}}
+    assert len(calls) == 2 and elapsed < 1.0
+
+
+def test_cached_answer_expires_after_the_ttl(vespa, monkeypatch):
+    monkeypatch.setattr(search, "CACHE_TTL", 0.1)
+    calls = vespa(0.0)
+
+    async def sequence():
+        await search.search(q="shoes")
+        await search.search(q="shoes")  # cached
+        assert len(calls) == 1
+        await asyncio.sleep(0.15)
+        return await search.search(q="shoes")
+
+    assert _run(sequence()) == {"root": {"attempt": 1}}
+    assert len(calls) == 2
@@ -0,0 +1,77 @@
+import errno
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import deps
+import shm
+
+
+@pytest.fixture
+def shm_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(shm, "SHM_DIR", tmp_path / "shm")
+    return tmp_path / "shm"
+
+
+def _table(n: int) -> pa.Table:
+    return pa.table({"n": list(range(n))})
+
+
+def test_newer_snapshot_moves_the_pointer_and_unlinks_the_old_file(shm_dir):
+    builds = []
+
+    def build(n):
+        return lambda: builds.append(n) or _table(n)
+
+    assert shm.table("orders", (1.0, 10), None, build(1)).num_rows == 1
+    assert shm.published("orders") == (1.0, 10)
+    first = list(shm_dir.glob("orders.*.arrow"))
+
+    assert shm.table("orders", (1.0, 10), None, build(1)).num_rows == 1  # mapped, not rebuilt
+    assert shm.table("orders", (2.0, 20), None, build(2)).num_rows == 2
+    assert shm.published("orders") == (2.0, 20)
+    assert builds == [1, 2]
+    assert not any(p.exists() for p in first)
+
+    shm.table("orders", (1.5, 15), None, build(3))  # a late worker with an older file
+    assert shm.published("orders") == (2.0, 20)
+
+
+def test_failed_write_leaves_no_temporary_file(shm_dir, monkeypatch):
+    def full(sink, schema):
+        sink.write(b"partial")
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(shm.ipc, "new_file", full)
+    with pytest.raises(OSError):
+        shm.table("orders", (1.0, 10), None, lambda: _table(3))
+    assert [p.name for p in shm_dir.iterdir()] == ["orders.lock"]
+
+
+def test_failed_pointer_write_leaves_no_temporary_file(shm_dir, monkeypatch):
+    write_text = Path.write_text
+
+    def full(self, text):
+        write_text(self, text[:3])
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(Path, "write_text", full)
+    with pytest.raises(OSError):
+        shm.table("orders", (1.0, 10), None, lambda: _table(3))
+    assert not list(shm_dir.glob("*.tmp*"))
+    assert shm.published("orders") is None
+
+
+def test_workers_share_one_conversion(datasets, shm_dir, monkeypatch):
+    datasets(orders=pd.DataFrame({"n": [1, 2, 3]}))
+    reads = []
+    read_parquet = deps._read_parquet
+    monkeypatch.setattr(deps, "_read_parquet", lambda name: reads.append(name) or read_parquet(name))
+
+    assert deps._read("orders")["n"].tolist() == [1, 2, 3]
+    assert deps.cache_stats()["datasets"]["orders"]["source"] == "shm"
+    deps.clear_cache()  # another worker: maps the published file
+    assert deps._read("orders")["n"].tolist() == [1, 2, 3]
+    assert reads == ["orders"]
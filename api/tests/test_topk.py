@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from routers.cities_by_revenue import _known, _sum_by_city
+from topk import TopK
+
+
+@pytest.fixture
+def cities() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    n = 400
+    df = pd.DataFrame({
+        "country": rng.choice(["Sweden", "Denmark", "Norway", None], n),
+        "city": rng.choice([f"city{i}" for i in range(30)] + ["Unknown", None], n),
+        "total_revenue_sek": rng.integers(0, 50, n).astype(float),  # plenty of ties
+        "total_orders": rng.integers(1, 9, n).astype(float),
+    })
+    df.loc[::17, "total_revenue_sek"] = np.nan
+    return df
+
+
+def _nlargest(df: pd.DataFrame, group: str, by: str, k: int) -> pd.DataFrame:
+    return pd.concat([g.nlargest(k, by) for _, g in df.groupby(group, sort=True)], ignore_index=True)
+
+
+def test_groups_match_groupby_nlargest(cities):
+    top = TopK(cities, "country", "total_revenue_sek")
+    expected = _nlargest(cities, "country", "total_revenue_sek", 5)
+    got = pd.concat(top.groups(5).values(), ignore_index=True)
+    pd.testing.assert_frame_equal(got, expected)
+
+
+def test_get_one_group_ignoring_case(cities):
+    top = TopK(cities, "country", "total_revenue_sek")
+    expected = cities[cities["country"] == "Denmark"].nlargest(3, "total_revenue_sek").reset_index(drop=True)
+    pd.testing.assert_frame_equal(top.get(" denmark", 3), expected)
+    assert top.get("Finland", 3).empty
+    denmark = cities[cities["country"] == "Denmark"]
+    assert len(top.get("Denmark")) == denmark["total_revenue_sek"].notna().sum()  # k=None: the whole group
+
+
+def test_sum_by_city_matches_groupby(cities):
+    expected = (cities.groupby(["country", "city"], sort=True)[["total_revenue_sek", "total_orders"]]
+                      .sum().reset_index())
+    pd.testing.assert_frame_equal(_sum_by_city(cities), expected, check_dtype=False)
+
+
+def test_known_drops_unknown_cities_for_any_dtype(cities):
+    expected = ~cities["city"].fillna("").str.contains("unknown", case=False).to_numpy()
+    assert (_known(cities["city"]) == expected).all()
+    assert (_known(cities["city"].astype("category")) == expected).all()
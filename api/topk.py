@@ -0,0 +1,54 @@
+# topk.py (top-k rows per group with one stable sort, no per-group Python)
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from partitions import normalize
+
+
+class TopK:
+    """
+    Row order of `df` by `group` (sorted labels, null groups dropped) and then `by`
+    descending, with each group's range in that order. Ties keep their order in `df`:
+    the same rows and order groupby(group).apply(lambda g: g.nlargest(k, by)) returns.
+    Rows are only copied out for the groups / k actually asked for.
+    """
+
+    def __init__(self, df: pd.DataFrame, group: str, by: str):
+        self.df = df
+        codes, self.labels = pd.factorize(df[group], sort=True)
+        values = df[by].to_numpy(dtype=np.float64, na_value=np.nan)
+        rows = np.flatnonzero((codes >= 0) & ~np.isnan(values))  # nlargest skips NaN
+        # lexsort is stable and sorts by its last key first: group, then value descending
+        self.order = rows[np.lexsort((-values[rows], codes[rows]))]
+
+        bounds = np.searchsorted(codes[self.order], np.arange(len(self.labels) + 1))
+        self.starts, self.stops = bounds[:-1], bounds[1:]
+        self._index = {normalize(str(label)): i for i, label in enumerate(self.labels)}
+
+    def _take(self, positions: np.ndarray, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+        df = self.df if columns is None else self.df[list(columns)]
+        return df.iloc[self.order[positions]].reset_index(drop=True)
+
+    def get(self, label: str, k: Optional[int] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Top `k` rows of one group (all when k is None); `label` matched ignoring case / whitespace."""
+        i = self._index.get(normalize(label))
+        if i is None:
+            return self._take(np.arange(0), columns)
+        start, stop = self.starts[i], self.stops[i]
+        if k is not None:
+            stop = max(start, min(stop, start + k))
+        return self._take(np.arange(start, stop), columns)
+
+    def groups(self, k: int, columns: Optional[Sequence[str]] = None) -> dict:
+        """label -> top `k` rows, in label order. One gather for all groups, then slices."""
+        counts = np.minimum(self.stops - self.starts, k)
+        offsets = np.repeat(self.starts - np.cumsum(counts) + counts, counts)
+        head = self._take(np.arange(counts.sum()) + offsets, columns)
+        ends = np.cumsum(counts)
+        return {
+            label: head.iloc[end - n:end]
+            for label, n, end in zip(self.labels, counts, ends)
+            if n
+        }
@@ -25,7 +25,7 @@ export default function useTopRepurchase(country = COUNTRY, limit = 100) {
       country
     )}&limit=${limit}`;
 
-    fetch(url, { cache: "no-store", signal: ctrl.signal })
+    fetch(url, { cache: "no-cache", signal: ctrl.signal })
       .then((res) => {
         if (!res.ok) throw new Error(`HTTP ${res.status}`);
         return res.json();
@@ -15,7 +15,7 @@ export default function useAgeDistribution() {
     const ctrl = new AbortController();
 
     setLoading(true);
-    fetch(`${base}/customers_age_gender`, { cache: "no-store", signal: ctrl.signal })
+    fetch(`${base}/customers_age_gender`, { cache: "no-cache", signal: ctrl.signal })
       .then((r) => {
         if (!r.ok) throw new Error(`HTTP ${r.status}`);
         return r.json();
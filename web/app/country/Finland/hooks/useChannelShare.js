@@ -18,7 +18,7 @@ export default function useChannelShare(country = COUNTRY) {
     setLoading(true);
     setError(null);
 
-    fetch(`${base}/countries_by_channel`, { cache: "no-store", signal: ctrl.signal })
+    fetch(`${base}/countries_by_channel`, { cache: "no-cache", signal: ctrl.signal })
       .then((r) => {
         if (!r.ok) throw new Error(`HTTP ${r.status}`);
         return r.json();
@@ -20,7 +20,7 @@ export default function useChannelShareMonthly(country = COUNTRY) {
         setError(null);
 
         const res = await fetch(`${apiBase()}/countries_by_channel_by_month`, {
-          cache: "no-store",
+          cache: "no-cache",
           signal: ctrl.signal,
         });
         if (!res.ok) throw new Error(`HTTP ${res.status}`);
@@ -40,8 +40,8 @@ export function useMonthlyForecast({ country, anchorEndYM = "2025-05", months =
     const prevUrl = `${base}/sales_month?start_month=${encodeURIComponent(prevYearYM(startYM))}`;
 
     Promise.all([
-      fetch(currUrl, { cache: "no-store", signal: ctrl.signal }).then((r) => (r.ok ? r.json() : null)).catch(() => null),
-      fetch(prevUrl, { cache: "no-store", signal: ctrl.signal }).then((r) => (r.ok ? r.json() : null)).catch(() => null),
+      fetch(currUrl, { cache: "no-cache", signal: ctrl.signal }).then((r) => (r.ok ? r.json() : null)).catch(() => null),
+      fetch(prevUrl, { cache: "no-cache", signal: ctrl.signal }).then((r) => (r.ok ? r.json() : null)).catch(() => null),
     ])
       .then(([currJson, prevJson]) => {
         if (cancelled) return;
@@ -40,7 +40,7 @@ export function useTopCategories(country = COUNTRY, limit = 12) {
         const base = (apiBase() || "/api").replace(/\/+$/, "");
         const url = `${base}/top_categories_by_season/?country=${encodeURIComponent(country)}`;
 
-        const res = await fetch(url, { cache: "no-store", signal: ctrl.signal });
+        const res = await fetch(url, { cache: "no-cache", signal: ctrl.signal });
         if (!res.ok) throw new Error(`HTTP ${res.status}`);
         const json = await res.json();
         if (abort) return;
@@ -109,7 +109,7 @@ export function useTopCategories(country = COUNTRY, limit = 12) {
           country
         )}&season_label=${encodeURIComponent(sl)}&limit=${limit}`;
 
-        const res = await fetch(url, { cache: "no-store", signal: ctrl.signal });
+        const res = await fetch(url, { cache: "no-cache", signal: ctrl.signal });
         if (abort) return;
 
         if (res.status === 404) {
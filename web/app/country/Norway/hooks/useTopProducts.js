@@ -42,7 +42,7 @@ export default function useTopProducts(country = COUNTRY, limit = 100) {
         const base = (apiBase() || "/api").replace(/\/+$/, "");
         const url = `${base}/top_products_by_season/?country=${encodeURIComponent(country)}`;
 
-        const res = await fetch(url, { cache: "no-store", signal: ctrl.signal });
+        const res = await fetch(url, { cache: "no-cache", signal: ctrl.signal });
         if (!res.ok) throw new Error(`HTTP ${res.status}`);
         const { data } = await res.json();
         if (cancelled) return;
@@ -110,7 +110,7 @@ export default function useTopProducts(country = COUNTRY, limit = 100) {
           country
         )}&season_label=${encodeURIComponent(sl)}&limit=${limit}`;
 
-        const res = await fetch(url, { cache: "no-store", signal: ctrl.signal });
+        const res = await fetch(url, { cache: "no-cache", signal: ctrl.signal });
         if (cancelled) return;
 
         if (res.status === 404) {
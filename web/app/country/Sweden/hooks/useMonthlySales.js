@@ -48,7 +48,7 @@ export function useMonthlySales({ country, startYM, endYM }) {
       console.log("useMonthlySales →", { url, country });
     }
 
-    fetch(url, { cache: "no-store", signal: ctrl.signal })
+    fetch(url, { cache: "no-cache", signal: ctrl.signal })
       .then(async (r) => {
         if (!r.ok) {
           const text = await r.text().catch(() => "");
@@ -22,7 +22,7 @@ export function useTopBrands(country = COUNTRY, limit = 10) {
     const base = (apiBase() || "/api").replace(/\/+$/, "");
     const url = `${base}/top_brands_by_country/?country=${encodeURIComponent(country)}&limit=${limit}`;
 
-    fetch(url, { cache: "no-store", signal: ctrl.signal })
+    fetch(url, { cache: "no-cache", signal: ctrl.signal })
       .then((res) => {
         if (!res.ok) throw new Error(`HTTP ${res.status}`);
         return res.json();
@@ -21,7 +21,7 @@ export default function useTopCities({ country, countryId, limit = 10 }) {
       ? `${base}/country/${encodeURIComponent(country)}/top-cities?limit=${limit}`
       : `${base}/country/${encodeURIComponent(countryId ?? "")}/top-cities?limit=${limit}`;
 
-    fetch(url, { cache: "no-store", signal: ctrl.signal })
+    fetch(url, { cache: "no-cache", signal: ctrl.signal })
       .then((r) => (r.ok ? r.json() : Promise.reject(new Error(`HTTP ${r.status}`))))
       .then((json) => {
         if (!active) return;
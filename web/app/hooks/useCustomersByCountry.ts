@@ -16,7 +16,7 @@ function api(path: string) {
 async function fetchJsonFlexible(url: string, signal?: AbortSignal): Promise<Jsonish> {
   let res: Response;
   try {
-    res = await fetch(url, { headers: { Accept: "application/json" }, cache: "no-store", signal });
+    res = await fetch(url, { headers: { Accept: "application/json" }, cache: "no-cache", signal });
   } catch (e: any) {
     throw new Error(`Network error fetching ${url}: ${e?.message || e}`);
   }
@@ -25,7 +25,7 @@ export function useReturningBuckets() {
     let abort = false;
 
     async function fetchJSON(url: string) {
-      const res = await fetch(url, { cache: "no-store" });
+      const res = await fetch(url, { cache: "no-cache" });
       if (!res.ok) throw new Error(`HTTP ${res.status} @ ${url}`);
       return res.json() as Promise<ApiResp>;
     }